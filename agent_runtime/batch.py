@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Batch answering of question files
+Reads questions from JSONL, answers them concurrently and appends one JSON
+result per line as each one completes, so an interrupted run resumes where
+it stopped
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Log progress every N results
+PROGRESS_EVERY = 100
+
+# questions -> (index in questions, result or exception), in completion order
+BatchAnswerer = Callable[[Sequence[str]], Iterable[Tuple[int, Any]]]
+
+
+class BatchQuestion(NamedTuple):
+    """One line of a question file"""
+
+    id: str
+    question: str
+    # Other fields of the line (e.g. the expected answer), copied to the result
+    extra: Dict[str, Any]
+
+
+def read_questions(path: str) -> List[BatchQuestion]:
+    """Questions of a JSONL file: {"id": ..., "question": ...} per line (id defaults to the line number)"""
+    questions = []
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e})")
+            if isinstance(data, str):
+                data = {"question": data}
+            question = data.pop("question", None) if isinstance(data, dict) else None
+            if not isinstance(question, str) or not question.strip():
+                raise ValueError(f"{path}:{line_number}: expected an object with a \"question\" string")
+            question_id = str(data.pop("id", line_number))
+            questions.append(BatchQuestion(question_id, question, data))
+    return questions
+
+
+def answered_ids(path: str) -> Set[str]:
+    """Ids already answered in an output file (failed ones are retried)"""
+    answered = set()
+    if not os.path.exists(path):
+        return answered
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line of an interrupted run may be cut short
+                continue
+            if isinstance(record, dict) and "answer" in record and "error" not in record:
+                answered.add(str(record.get("id")))
+    return answered
+
+
+def _ends_with_newline(path: str) -> bool:
+    """True for an empty file or one whose last byte is a newline"""
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        if file.tell() == 0:
+            return True
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+
+def result_record(item: BatchQuestion, result: Any) -> Dict[str, Any]:
+    """Output line for a question: its input fields plus the run's answer and stats, or the error"""
+    record: Dict[str, Any] = {"id": item.id, "question": item.question, **item.extra}
+    if isinstance(result, BaseException):
+        record["error"] = f"{type(result).__name__}: {result}"
+    else:
+        record.update(
+            answer=result.answer,
+            source=result.source,
+            tool_calls=result.tool_calls,
+            usage=result.usage,
+        )
+    return record
+
+
+def answer_file(
+    input_path: str,
+    output_path: str,
+    answer_batch: BatchAnswerer,
+    resume: bool = True,
+) -> Dict[str, int]:
+    """Answer every question of input_path, appending results to output_path as they complete
+
+    With resume, questions already answered in output_path are skipped and
+    failed ones are retried (their new line comes after the old one, so the
+    last line of an id wins); without it the output file is overwritten.
+    """
+    questions = read_questions(input_path)
+    done = answered_ids(output_path) if resume else set()
+    todo = [item for item in questions if item.id not in done]
+    stats = {"total": len(questions), "skipped": len(questions) - len(todo), "answered": 0, "failed": 0}
+    logger.info(f"Batch: {len(todo)} questions to answer ({stats['skipped']} already answered)")
+
+    start = time.perf_counter()
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+        # Finish a line cut short by an interrupted run before appending
+        if resume and not _ends_with_newline(output_path):
+            output.write("\n")
+        for index, result in answer_batch([item.question for item in todo]):
+            record = result_record(todo[index], result)
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            stats["failed" if "error" in record else "answered"] += 1
+            finished = stats["answered"] + stats["failed"]
+            if finished % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                logger.info(f"Batch: {finished}/{len(todo)} done ({finished / elapsed:.1f} questions/s)")
+    stats["seconds"] = round(time.perf_counter() - start)
+    return stats
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Run budgets and token accounting
+Limits on LLM steps, tool calls, wall time and tokens for one agent run, so
+a looping llm <-> tools cycle ends early instead of at the recursion limit,
+and cumulative token ledgers per thread and per user
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from agent_runtime import config
+from agent_runtime.metrics import llm_usage
+
+
+class RunBudget(NamedTuple):
+    """Limits of one agent run (0 = no limit)"""
+
+    llm_steps: int = config.RUN_MAX_LLM_STEPS
+    tool_calls: int = config.RUN_MAX_TOOL_CALLS
+    seconds: float = config.RUN_MAX_SECONDS
+    input_tokens: int = config.RUN_MAX_INPUT_TOKENS
+    output_tokens: int = config.RUN_MAX_OUTPUT_TOKENS
+
+    def recursion_limit(self) -> Optional[int]:
+        """LangGraph step limit matching llm_steps (context, budget and llm/tools pairs), as a backstop"""
+        return 2 * self.llm_steps + 3 if self.llm_steps else None
+
+    def exceeded(self, messages: Sequence[Any], started_at: Optional[float] = None) -> Optional[str]:
+        """Why a run can't take another llm/tools step, or None if it can
+
+        messages are the run's own messages, ending with the model's latest
+        reply; its pending tool calls count against the tool-call limit.
+        """
+        llm_steps = tool_calls = input_tokens = output_tokens = 0
+        for message in messages:
+            if message.type != "ai":
+                continue
+            llm_steps += 1
+            tool_calls += len(message.tool_calls)
+            message_input, message_output, _ = llm_usage(message)
+            input_tokens += message_input
+            output_tokens += message_output
+        # Running the pending tools means one more model call afterwards
+        if self.llm_steps and llm_steps >= self.llm_steps:
+            return "llm_steps"
+        if self.tool_calls and tool_calls > self.tool_calls:
+            return "tool_calls"
+        if self.seconds and started_at is not None and time.monotonic() - started_at >= self.seconds:
+            return "time"
+        if self.input_tokens and input_tokens >= self.input_tokens:
+            return "input_tokens"
+        if self.output_tokens and output_tokens >= self.output_tokens:
+            return "output_tokens"
+        return None
+
+
+class TokenLedger:
+    """Cumulative input/output tokens per key (thread or user), LRU-bounded"""
+
+    def __init__(self, max_keys: int = config.TOKEN_LEDGER_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [input tokens, output tokens]
+        self._totals: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = [0, 0]
+            totals[0] += input_tokens
+            totals[1] += output_tokens
+            self._totals.move_to_end(key)
+            while len(self._totals) > self.max_keys:
+                self._totals.popitem(last=False)
+
+    def get(self, key: str) -> Tuple[int, int]:
+        with self._lock:
+            totals = self._totals.get(key, (0, 0))
+            return totals[0], totals[1]
+
+    def top(self, count: int = config.TOKEN_LEDGER_TOP_N) -> List[Tuple[str, int, int]]:
+        """(key, input, output) of the keys with the most tokens"""
+        with self._lock:
+            items = [(key, totals[0], totals[1]) for key, totals in self._totals.items()]
+        return sorted(items, key=lambda item: item[1] + item[2], reverse=True)[:count]
+
+    def samples(self, count: int = config.TOKEN_LEDGER_TOP_N) -> Dict[Tuple[str, str], int]:
+        """Gauge samples {(key, direction): tokens} of the top keys"""
+        samples = {}
+        for key, input_tokens, output_tokens in self.top(count):
+            samples[(key, "input")] = input_tokens
+            samples[(key, "output")] = output_tokens
+        return samples
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "keys": len(self._totals),
+                "input_tokens": sum(totals[0] for totals in self._totals.values()),
+                "output_tokens": sum(totals[1] for totals in self._totals.values()),
+            }
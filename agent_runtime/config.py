@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Runtime configuration for the Animales Agent
+All tunables are read from environment variables (see env_example.txt)
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def env_str(name: str, default: str) -> str:
+    """Read a string setting from the environment"""
+    value = os.getenv(name)
+    return value.strip() if value and value.strip() else default
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Agent routing (several domain agents behind one Slack app)
+# Channel routes, e.g. "C0123ABC=animales,C0456DEF=otro"; other channels use the keyword classifier
+AGENT_CHANNEL_ROUTES = env_str("AGENT_CHANNEL_ROUTES", "")
+AGENT_DEFAULT = env_str("AGENT_DEFAULT", "animales")
+# Extra agent modules to import at startup (comma separated); each registers its AgentSpec
+AGENT_MODULES = env_str("AGENT_MODULES", "")
+
+# Local pre-filter: off-topic questions get the canned redirect without calling the model
+PREFILTER_ENABLED = env_bool("PREFILTER_ENABLED", True)
+# Model tiering: simple questions use MODEL_SIMPLE, complex ones MODEL_COMPLEX (empty = the agent's model)
+MODEL_SIMPLE = env_str("MODEL_SIMPLE", "")
+MODEL_COMPLEX = env_str("MODEL_COMPLEX", "")
+# Questions with at least this many words are considered complex
+MODEL_COMPLEX_MIN_WORDS = env_int("MODEL_COMPLEX_MIN_WORDS", 25)
+
+# Conversation store (thread_ts -> agent_state)
+# Backend: "memory" (single process) or "sqlite" (shared between worker processes)
+CONVERSATION_STORE_BACKEND = env_str("CONVERSATION_STORE_BACKEND", "memory").lower()
+CONVERSATION_STORE_PATH = env_str("CONVERSATION_STORE_PATH", "conversations.db")
+CONVERSATION_STORE_MAX_THREADS = env_int("CONVERSATION_STORE_MAX_THREADS", 1000)
+CONVERSATION_STORE_TTL_SECONDS = env_float("CONVERSATION_STORE_TTL_SECONDS", 24 * 60 * 60)
+CONVERSATION_STORE_MAX_BYTES = env_int("CONVERSATION_STORE_MAX_BYTES", 64 * 1024 * 1024)
+
+# Slack event deduplication (Slack redelivers events that are not acknowledged in time)
+# Backend: "memory" (single process) or "sqlite" (shared between worker processes)
+EVENT_DEDUP_BACKEND = env_str("EVENT_DEDUP_BACKEND", CONVERSATION_STORE_BACKEND).lower()
+EVENT_DEDUP_PATH = env_str("EVENT_DEDUP_PATH", CONVERSATION_STORE_PATH)
+EVENT_DEDUP_TTL_SECONDS = env_float("EVENT_DEDUP_TTL_SECONDS", 10 * 60)
+EVENT_DEDUP_MAX_ENTRIES = env_int("EVENT_DEDUP_MAX_ENTRIES", 10000)
+
+# Message processing (worker pool shared by all Slack threads)
+AGENT_MAX_WORKERS = env_int("AGENT_MAX_WORKERS", 8)
+AGENT_MAX_QUEUE_DEPTH = env_int("AGENT_MAX_QUEUE_DEPTH", 100)
+
+# Worker processes, each with its own Socket Mode connection; every Slack thread is
+# handled by one of them (1 = a single process, no supervisor)
+SLACK_WORKERS = env_int("SLACK_WORKERS", 1)
+# On SIGTERM/SIGINT, seconds a worker waits for in-flight messages to finish
+SHUTDOWN_DRAIN_SECONDS = env_float("SHUTDOWN_DRAIN_SECONDS", 30)
+
+# Rate limiting (token buckets per user, channel and workspace; rates are per minute)
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_USER_PER_MINUTE = env_float("RATE_LIMIT_USER_PER_MINUTE", 10)
+RATE_LIMIT_USER_BURST = env_int("RATE_LIMIT_USER_BURST", 5)
+RATE_LIMIT_CHANNEL_PER_MINUTE = env_float("RATE_LIMIT_CHANNEL_PER_MINUTE", 30)
+RATE_LIMIT_CHANNEL_BURST = env_int("RATE_LIMIT_CHANNEL_BURST", 10)
+RATE_LIMIT_WORKSPACE_PER_MINUTE = env_float("RATE_LIMIT_WORKSPACE_PER_MINUTE", 300)
+RATE_LIMIT_WORKSPACE_BURST = env_int("RATE_LIMIT_WORKSPACE_BURST", 50)
+# Agent runs in flight across all threads; extra messages wait up to the timeout, then get a "busy" reply.
+# Below AGENT_MAX_WORKERS, so a burst queues (and says so) instead of piling up on the model
+AGENT_MAX_CONCURRENT_RUNS = env_int("AGENT_MAX_CONCURRENT_RUNS", max(1, AGENT_MAX_WORKERS // 2))
+AGENT_RUN_QUEUE_TIMEOUT = env_float("AGENT_RUN_QUEUE_TIMEOUT", 30)
+
+# Context window (turns sent verbatim to the model, older turns are summarized)
+CONTEXT_MAX_TURNS = env_int("CONTEXT_MAX_TURNS", 6)
+CONTEXT_MAX_TOKENS = env_int("CONTEXT_MAX_TOKENS", 4000)
+CONTEXT_SUMMARY_ENABLED = env_bool("CONTEXT_SUMMARY_ENABLED", True)
+# Older turns are folded in batches: only once the history exceeds CONTEXT_MAX_TURNS by this many
+# turns (or the token budget), and then down to CONTEXT_MAX_TURNS, so most replies skip the summarizer
+CONTEXT_SUMMARY_BATCH_TURNS = env_int("CONTEXT_SUMMARY_BATCH_TURNS", 4)
+# Finished turns are stored as slim (role, text) records without provider metadata or
+# tool messages; tool results are kept as a note of at most HISTORY_TOOL_NOTE_CHARS (0 = none)
+HISTORY_COMPACT_ENABLED = env_bool("HISTORY_COMPACT_ENABLED", True)
+HISTORY_TOOL_NOTE_CHARS = env_int("HISTORY_TOOL_NOTE_CHARS", 160)
+
+# Streaming replies to Slack (placeholder message edited as tokens arrive)
+SLACK_STREAMING_ENABLED = env_bool("SLACK_STREAMING_ENABLED", True)
+SLACK_STREAM_UPDATE_INTERVAL = env_float("SLACK_STREAM_UPDATE_INTERVAL", 1.0)
+SLACK_STREAM_MIN_CHARS = env_int("SLACK_STREAM_MIN_CHARS", 40)
+
+# Response cache for repeated first-turn questions
+RESPONSE_CACHE_ENABLED = env_bool("RESPONSE_CACHE_ENABLED", True)
+RESPONSE_CACHE_MAX_ENTRIES = env_int("RESPONSE_CACHE_MAX_ENTRIES", 500)
+RESPONSE_CACHE_TTL_SECONDS = env_float("RESPONSE_CACHE_TTL_SECONDS", 6 * 60 * 60)
+# Optional nearest-neighbor lookup on question embeddings
+RESPONSE_CACHE_SEMANTIC = env_bool("RESPONSE_CACHE_SEMANTIC", False)
+RESPONSE_CACHE_SIMILARITY = env_float("RESPONSE_CACHE_SIMILARITY", 0.92)
+RESPONSE_CACHE_EMBEDDING_MODEL = env_str("RESPONSE_CACHE_EMBEDDING_MODEL", "models/text-embedding-004")
+
+# Suggested prompts shown when an AI app thread starts. "alternates" are the same
+# question in the other language; warm-up precomputes answers for all of them.
+SUGGESTED_PROMPTS = [
+    {
+        "title": "Animales rápidos",
+        "message": "¿Cuáles son los animales más rápidos del mundo?",
+        "alternates": ["What are the fastest animals in the world?"],
+    },
+    {
+        "title": "Animal más grande",
+        "message": "What is the largest animal on Earth?",
+        "alternates": ["¿Cuál es el animal más grande de la Tierra?"],
+    },
+    {
+        "title": "Gatos",
+        "message": "¿Por qué los gatos ronronean?",
+        "alternates": ["Why do cats purr?"],
+    },
+    {
+        "title": "Pingüinos",
+        "message": "How do penguins survive in cold weather?",
+        "alternates": ["¿Cómo sobreviven los pingüinos al frío?"],
+    },
+]
+
+# Background warm-up of the suggested prompts' answers
+PROMPT_WARMUP_ENABLED = env_bool("PROMPT_WARMUP_ENABLED", True)
+PROMPT_WARMUP_INTERVAL_SECONDS = env_float("PROMPT_WARMUP_INTERVAL_SECONDS", 60 * 60)
+
+
+def suggested_prompts_for_slack():
+    """Suggested prompts in the format expected by assistant.threads.setSuggestedPrompts"""
+    return [{"title": prompt["title"], "message": prompt["message"]} for prompt in SUGGESTED_PROMPTS]
+
+
+def suggested_prompt_questions():
+    """Every question to warm up: the advertised message plus its alternates"""
+    questions = []
+    for prompt in SUGGESTED_PROMPTS:
+        questions.append(prompt["message"])
+        questions.extend(prompt.get("alternates", []))
+    return questions
+
+# Tool execution (independent tool calls of one model turn run concurrently)
+TOOL_MAX_WORKERS = env_int("TOOL_MAX_WORKERS", 8)
+TOOL_TIMEOUT_SECONDS = env_float("TOOL_TIMEOUT_SECONDS", 10.0)
+
+# LLM resilience: deadlines, circuit breaker and fallback model
+# Time budget for a whole Slack message, from receipt to reply
+AGENT_DEADLINE_SECONDS = env_float("AGENT_DEADLINE_SECONDS", 60)
+# Longest single LLM call; the client's own retries happen inside this limit
+LLM_TIMEOUT_SECONDS = env_float("LLM_TIMEOUT_SECONDS", 20)
+LLM_MAX_RETRIES = env_int("LLM_MAX_RETRIES", 1)
+# LLM calls running at once per process; more wait for a free slot (not counted in LLM_TIMEOUT_SECONDS)
+LLM_MAX_CONCURRENT_CALLS = env_int("LLM_MAX_CONCURRENT_CALLS", AGENT_MAX_WORKERS * 2)
+# Secondary model used when the primary fails or its circuit is open (empty = none)
+LLM_FALLBACK_MODEL = env_str("LLM_FALLBACK_MODEL", "")
+# The circuit opens when CIRCUIT_FAILURE_THRESHOLD of the last CIRCUIT_WINDOW calls failed or were slow
+CIRCUIT_FAILURE_THRESHOLD = env_int("CIRCUIT_FAILURE_THRESHOLD", 5)
+CIRCUIT_WINDOW = env_int("CIRCUIT_WINDOW", 20)
+CIRCUIT_SLOW_CALL_SECONDS = env_float("CIRCUIT_SLOW_CALL_SECONDS", 15)
+# Seconds the circuit stays open before letting a trial call through
+CIRCUIT_RESET_SECONDS = env_float("CIRCUIT_RESET_SECONDS", 30)
+
+# Per-run budget of the llm <-> tools loop (0 = no limit); a run over budget stops
+# calling tools and answers with what it has
+RUN_MAX_LLM_STEPS = env_int("RUN_MAX_LLM_STEPS", 5)
+RUN_MAX_TOOL_CALLS = env_int("RUN_MAX_TOOL_CALLS", 10)
+RUN_MAX_SECONDS = env_float("RUN_MAX_SECONDS", 45)
+RUN_MAX_INPUT_TOKENS = env_int("RUN_MAX_INPUT_TOKENS", 60000)
+RUN_MAX_OUTPUT_TOKENS = env_int("RUN_MAX_OUTPUT_TOKENS", 4000)
+# Cumulative tokens per thread and per user: keys kept, and top keys exposed as metrics
+TOKEN_LEDGER_MAX_KEYS = env_int("TOKEN_LEDGER_MAX_KEYS", 10000)
+TOKEN_LEDGER_TOP_N = env_int("TOKEN_LEDGER_TOP_N", 10)
+
+# Batch answering of question files (questions answered at the same time)
+BATCH_MAX_CONCURRENCY = env_int("BATCH_MAX_CONCURRENCY", 8)
+
+# Tool result cache (entries kept per cached tool)
+TOOL_CACHE_ENABLED = env_bool("TOOL_CACHE_ENABLED", True)
+TOOL_CACHE_MAX_ENTRIES = env_int("TOOL_CACHE_MAX_ENTRIES", 256)
+
+# Metrics and tracing
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+METRICS_HOST = env_str("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = env_int("METRICS_PORT", 9464)
+# Also emit OpenTelemetry spans (requires the opentelemetry-api package and an SDK setup)
+OTEL_ENABLED = env_bool("OTEL_ENABLED", False)
+
+# Slack Web API endpoint (benchmarks point it at a local stand-in)
+SLACK_API_BASE_URL = env_str("SLACK_API_BASE_URL", "https://slack.com/api/")
+# Retries of rate-limited Web API calls (waits for Slack's Retry-After)
+SLACK_API_MAX_RETRIES = env_int("SLACK_API_MAX_RETRIES", 2)
+# Background threads for status updates and other fire-and-forget Web API calls
+SLACK_IO_MAX_WORKERS = env_int("SLACK_IO_MAX_WORKERS", 4)
+
+# Logging
+LOG_LEVEL = env_str("LOG_LEVEL", "INFO").upper()
+# "text" or "json" (one JSON object per line)
+LOG_FORMAT = env_str("LOG_FORMAT", "text").lower()
+# Fraction of DEBUG/INFO records kept (warnings and errors are always kept)
+LOG_SAMPLE_RATE = env_float("LOG_SAMPLE_RATE", 1.0)
+# Log user/assistant text verbatim instead of length + hash
+LOG_USER_CONTENT = env_bool("LOG_USER_CONTENT", False)
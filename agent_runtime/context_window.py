@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Context window management for long conversations
+Keeps the last turns verbatim and folds older ones into a running summary,
+a batch of turns at a time
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+
+from agent_runtime import config
+
+logger = logging.getLogger(__name__)
+
+# After a trim for tokens, the kept turns fit in this share of the token budget
+TOKEN_LOW_WATER = 0.75
+
+# (previous_summary, messages_to_fold, deadline) -> new_summary
+Summarizer = Callable[[str, Sequence[BaseMessage], Optional[float]], str]
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting"""
+    chars = 0
+    for message in messages:
+        content = message.content
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    return chars // 4
+
+
+def turn_starts(messages: Sequence[BaseMessage]) -> List[int]:
+    """Indexes where a turn (a user message and everything after it) begins"""
+    # By type, so compacted history entries count like messages
+    return [index for index, message in enumerate(messages) if message.type == "human"]
+
+
+class ContextWindowManager:
+    """Graph node that trims the earlier turns ("history") to a window of recent turns
+
+    Whole turns are dropped so tool calls and their results are never split.
+    Dropped turns are folded into the existing summary, so each turn is only
+    summarized once instead of re-summarizing the full history. The current
+    run's messages ("messages") count towards the budget but are always kept.
+
+    Trimming has hysteresis: nothing is dropped until the window holds more
+    than max_turns + batch_turns turns or more than max_tokens tokens; then
+    it is cut back to max_turns turns and TOKEN_LOW_WATER of the tokens, so
+    the summarizer runs about once every batch_turns replies, not on each one.
+    """
+
+    def __init__(
+        self,
+        summarize: Summarizer,
+        max_turns: int = config.CONTEXT_MAX_TURNS,
+        max_tokens: int = config.CONTEXT_MAX_TOKENS,
+        summary_enabled: bool = config.CONTEXT_SUMMARY_ENABLED,
+        batch_turns: int = config.CONTEXT_SUMMARY_BATCH_TURNS,
+    ):
+        self.summarize = summarize
+        self.max_turns = max(1, max_turns)
+        self.max_tokens = max_tokens
+        self.summary_enabled = summary_enabled
+        self.batch_turns = max(0, batch_turns)
+
+    def window_start(self, messages: Sequence[BaseMessage]) -> int:
+        """Index of the first message to keep verbatim"""
+        starts = turn_starts(messages)
+        if not starts:
+            return 0
+        if len(starts) <= self.max_turns + self.batch_turns and estimate_tokens(messages) <= self.max_tokens:
+            return 0
+        kept = starts[-self.max_turns:]
+        # Enforce the token budget with some headroom, but always keep the current turn
+        while len(kept) > 1 and estimate_tokens(messages[kept[0]:]) > self.max_tokens * TOKEN_LOW_WATER:
+            kept = kept[1:]
+        return kept[0]
+
+    def __call__(self, state: Dict[str, Any], config=None) -> Dict[str, Any]:
+        history = state.get("history") or []
+        if not history:
+            return {}
+        # The current turn starts with a user message, so the cut never goes past the history
+        cut = self.window_start([*history, *state["messages"]])
+        if cut == 0:
+            return {}
+
+        dropped = history[:cut]
+        summary = state.get("summary", "")
+        if self.summary_enabled:
+            try:
+                # Bounded by the run's deadline, if any (see animales_agent._prepare_run)
+                deadline = (config or {}).get("configurable", {}).get("deadline")
+                summary = self.summarize(summary, dropped, deadline)
+            except Exception as e:
+                # Keep answering with the previous summary rather than failing the turn
+                logger.warning(f"Could not update conversation summary: {e}")
+
+        logger.debug(f"Context window: folded {len(dropped)} messages, keeping {len(history) - cut}")
+        return {"history": history[cut:], "summary": summary}
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Conversation state stores for the Slack integration
+Keeps each thread's agent state in memory (LRU + TTL + memory budget) or in
+SQLite so several worker processes can share the same conversations
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from agent_runtime import config
+from agent_runtime.history import HistoryEntry
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message overhead (object headers, ids, metadata) used for size estimates
+_MESSAGE_OVERHEAD_BYTES = 512
+# Same for a compacted history entry (slotted object, list slot and string header)
+_ENTRY_OVERHEAD_BYTES = 120
+
+
+def estimate_state_size(state: Dict[str, Any]) -> int:
+    """Cheap estimate of the memory held by an agent state, in bytes"""
+    size = 0
+    for message in state.get("messages", []):
+        if isinstance(message, HistoryEntry):
+            size += _ENTRY_OVERHEAD_BYTES + len(message.content) + len(message.tools or "")
+            continue
+        content = getattr(message, "content", "")
+        size += _MESSAGE_OVERHEAD_BYTES + len(content if isinstance(content, str) else str(content))
+    return size
+
+
+def _message_to_record(message) -> Dict[str, Any]:
+    """Compact, JSON-friendly form of a message (drops provider metadata)"""
+    if isinstance(message, HistoryEntry):
+        record = {"t": message.type, "c": message.content, "h": 1}
+        if message.tools:
+            record["x"] = message.tools
+        return record
+    record: Dict[str, Any] = {"t": message.type, "c": message.content}
+    if message.id:
+        record["i"] = message.id
+    if message.type == "ai" and message.tool_calls:
+        record["tc"] = [
+            {"n": call["name"], "a": call["args"], "i": call["id"]} for call in message.tool_calls
+        ]
+    if message.type == "tool":
+        record["n"] = message.name
+        record["ti"] = message.tool_call_id
+    return record
+
+
+def _record_to_message(record: Dict[str, Any]):
+    """Rebuild a LangChain message (or history entry) from its compact record"""
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+    message_type = record["t"]
+    content = record["c"]
+    if record.get("h"):
+        return HistoryEntry(message_type, content, record.get("x"))
+    message_id = record.get("i")
+    if message_type == "human":
+        return HumanMessage(content=content, id=message_id)
+    if message_type == "ai":
+        tool_calls = [
+            {"name": call["n"], "args": call["a"], "id": call["i"], "type": "tool_call"}
+            for call in record.get("tc", [])
+        ]
+        return AIMessage(content=content, id=message_id, tool_calls=tool_calls)
+    if message_type == "tool":
+        return ToolMessage(content=content, id=message_id, name=record.get("n"), tool_call_id=record["ti"])
+    if message_type == "system":
+        return SystemMessage(content=content, id=message_id)
+    raise ValueError(f"Unknown message type in stored state: {message_type}")
+
+
+def serialize_state(state: Dict[str, Any]) -> str:
+    """Serialize an agent state to compact JSON"""
+    data = {key: value for key, value in state.items() if key != "messages"}
+    data["messages"] = [_message_to_record(message) for message in state.get("messages", [])]
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def deserialize_state(payload: str) -> Dict[str, Any]:
+    """Rebuild an agent state serialized with serialize_state"""
+    data = json.loads(payload)
+    data["messages"] = [_record_to_message(record) for record in data.get("messages", [])]
+    return data
+
+
+class ConversationStore(ABC):
+    """Interface for thread_ts -> agent_state storage"""
+
+    @abstractmethod
+    def get(self, thread_ts: str) -> Optional[Dict[str, Any]]:
+        """Return the stored state for a thread, or None"""
+
+    @abstractmethod
+    def set(self, thread_ts: str, state: Dict[str, Any]) -> None:
+        """Store the state for a thread"""
+
+    @abstractmethod
+    def delete(self, thread_ts: str) -> None:
+        """Forget a thread"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Return store metrics (size, hits, misses, evictions)"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of threads currently stored"""
+
+
+class _Entry(NamedTuple):
+    state: Dict[str, Any]
+    size: int
+    expires_at: float
+
+
+class InMemoryConversationStore(ConversationStore):
+    """In-process store with LRU + TTL eviction and a memory budget"""
+
+    def __init__(
+        self,
+        max_threads: int = config.CONVERSATION_STORE_MAX_THREADS,
+        ttl_seconds: float = config.CONVERSATION_STORE_TTL_SECONDS,
+        max_bytes: int = config.CONVERSATION_STORE_MAX_BYTES,
+    ):
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "evictions_lru": 0,
+            "evictions_ttl": 0,
+            "evictions_memory": 0,
+        }
+
+    def get(self, thread_ts: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            entry = self._entries.get(thread_ts)
+            if entry is None:
+                self._metrics["misses"] += 1
+                return None
+            # Accessing a thread refreshes both its LRU position and its TTL
+            self._entries[thread_ts] = entry._replace(expires_at=now + self.ttl_seconds)
+            self._entries.move_to_end(thread_ts)
+            self._metrics["hits"] += 1
+            return entry.state
+
+    def set(self, thread_ts: str, state: Dict[str, Any]) -> None:
+        size = estimate_state_size(state)
+        with self._lock:
+            now = time.monotonic()
+            self._remove(thread_ts)
+            if size > self.max_bytes:
+                logger.warning(
+                    "Conversation state for thread %s (%d bytes) exceeds the store budget, not storing it",
+                    thread_ts, size,
+                )
+                self._metrics["evictions_memory"] += 1
+                return
+            self._entries[thread_ts] = _Entry(state, size, now + self.ttl_seconds)
+            self._bytes += size
+            self._purge_expired(now)
+            while len(self._entries) > self.max_threads:
+                self._evict_oldest("evictions_lru")
+            while self._bytes > self.max_bytes:
+                self._evict_oldest("evictions_memory")
+
+    def delete(self, thread_ts: str) -> None:
+        with self._lock:
+            self._remove(thread_ts)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"threads": len(self._entries), "bytes": self._bytes, **self._metrics}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, thread_ts: str) -> None:
+        entry = self._entries.pop(thread_ts, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict_oldest(self, reason: str) -> None:
+        thread_ts, entry = self._entries.popitem(last=False)
+        self._bytes -= entry.size
+        self._metrics[reason] += 1
+        logger.debug("Evicted conversation state for thread %s (%s)", thread_ts, reason)
+
+    def _purge_expired(self, now: float) -> None:
+        # Entries are ordered by last access and share one TTL, so expired ones are at the front
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at > now:
+                break
+            self._evict_oldest("evictions_ttl")
+
+
+class SQLiteConversationStore(ConversationStore):
+    """SQLite-backed store that can be shared by several worker processes"""
+
+    # Run expiry/size pruning every N writes instead of on every message
+    PRUNE_EVERY = 100
+
+    def __init__(
+        self,
+        path: str = config.CONVERSATION_STORE_PATH,
+        max_threads: int = config.CONVERSATION_STORE_MAX_THREADS,
+        ttl_seconds: float = config.CONVERSATION_STORE_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "evictions_lru": 0,
+            "evictions_ttl": 0,
+            "evictions_memory": 0,
+        }
+        self._connection().execute(
+            """
+            CREATE TABLE IF NOT EXISTS conversation_states (
+                thread_ts TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection().execute(
+            "CREATE INDEX IF NOT EXISTS idx_conversation_states_updated_at "
+            "ON conversation_states (updated_at)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads, keep one per thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, metric: str, amount: int = 1) -> None:
+        with self._lock:
+            self._metrics[metric] += amount
+
+    def get(self, thread_ts: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT state, updated_at FROM conversation_states WHERE thread_ts = ?",
+            (thread_ts,),
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        payload, updated_at = row
+        if time.time() - updated_at > self.ttl_seconds:
+            self.delete(thread_ts)
+            self._count("evictions_ttl")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return deserialize_state(payload)
+
+    def set(self, thread_ts: str, state: Dict[str, Any]) -> None:
+        self._connection().execute(
+            """
+            INSERT INTO conversation_states (thread_ts, state, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(thread_ts) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+            """,
+            (thread_ts, serialize_state(state), time.time()),
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def delete(self, thread_ts: str) -> None:
+        self._connection().execute("DELETE FROM conversation_states WHERE thread_ts = ?", (thread_ts,))
+
+    def prune(self) -> None:
+        """Drop expired threads and the least recently updated ones beyond max_threads"""
+        connection = self._connection()
+        expired = connection.execute(
+            "DELETE FROM conversation_states WHERE updated_at < ?",
+            (time.time() - self.ttl_seconds,),
+        ).rowcount
+        overflow = connection.execute(
+            """
+            DELETE FROM conversation_states WHERE thread_ts IN (
+                SELECT thread_ts FROM conversation_states ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_threads,),
+        ).rowcount
+        self._count("evictions_ttl", expired)
+        self._count("evictions_lru", overflow)
+
+    def stats(self) -> Dict[str, int]:
+        threads, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM conversation_states"
+        ).fetchone()
+        with self._lock:
+            return {"threads": threads, "bytes": size, **self._metrics}
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM conversation_states").fetchone()[0]
+
+
+def create_conversation_store() -> ConversationStore:
+    """Create the conversation store configured through environment variables"""
+    backend = config.CONVERSATION_STORE_BACKEND
+    if backend == "memory":
+        return InMemoryConversationStore()
+    if backend == "sqlite":
+        logger.info(f"Using SQLite conversation store at {config.CONVERSATION_STORE_PATH}")
+        return SQLiteConversationStore()
+    raise ValueError(f"Unknown CONVERSATION_STORE_BACKEND: {backend} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Slack event deduplication
+Remembers recently handled event ids (event_id, client_msg_id) for a bounded
+time so redelivered events don't trigger a second agent run and reply
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from agent_runtime import config
+
+logger = logging.getLogger(__name__)
+
+
+def event_keys(event: Dict, body: Optional[Dict] = None) -> List[str]:
+    """Idempotency keys of a Slack event
+
+    event_id is stable across Slack's redeliveries of the same event;
+    client_msg_id is stable across different events for the same user message.
+    """
+    keys = []
+    if body and body.get("event_id"):
+        keys.append(f"event:{body['event_id']}")
+    if event.get("client_msg_id"):
+        keys.append(f"msg:{event['client_msg_id']}")
+    return keys
+
+
+class EventDeduplicator(ABC):
+    """Interface for a TTL set of already handled event keys"""
+
+    @abstractmethod
+    def claim(self, keys: Iterable[str]) -> bool:
+        """Record keys as handled; returns False if any of them was already seen"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Return deduplication metrics (size, accepted, duplicates)"""
+
+
+class InMemoryEventDeduplicator(EventDeduplicator):
+    """In-process TTL set bounded to max_entries keys"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = config.EVENT_DEDUP_TTL_SECONDS,
+        max_entries: int = config.EVENT_DEDUP_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._expires: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"accepted": 0, "duplicates": 0}
+
+    def claim(self, keys: Iterable[str]) -> bool:
+        keys = list(keys)
+        with self._lock:
+            now = time.monotonic()
+            # Keys are inserted in time order with one TTL, so expired ones are at the front
+            while self._expires and next(iter(self._expires.values())) <= now:
+                self._expires.popitem(last=False)
+            if any(key in self._expires for key in keys):
+                self._metrics["duplicates"] += 1
+                return False
+            for key in keys:
+                self._expires[key] = now + self.ttl_seconds
+            while len(self._expires) > self.max_entries:
+                self._expires.popitem(last=False)
+            self._metrics["accepted"] += 1
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"keys": len(self._expires), **self._metrics}
+
+
+class SQLiteEventDeduplicator(EventDeduplicator):
+    """SQLite-backed TTL set shared by several worker processes"""
+
+    # Run expiry pruning every N claims instead of on every event
+    PRUNE_EVERY = 100
+
+    def __init__(
+        self,
+        path: str = config.EVENT_DEDUP_PATH,
+        ttl_seconds: float = config.EVENT_DEDUP_TTL_SECONDS,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._claims = 0
+        self._metrics = {"accepted": 0, "duplicates": 0}
+        self._connection().execute(
+            """
+            CREATE TABLE IF NOT EXISTS handled_events (
+                event_key TEXT PRIMARY KEY,
+                handled_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads, keep one per thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def claim(self, keys: Iterable[str]) -> bool:
+        keys = list(keys)
+        now = time.time()
+        connection = self._connection()
+        # One write transaction, so two processes can't both claim the same event
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            placeholders = ",".join("?" for _ in keys)
+            duplicate = bool(keys) and connection.execute(
+                f"SELECT 1 FROM handled_events WHERE handled_at >= ? AND event_key IN ({placeholders}) LIMIT 1",
+                (now - self.ttl_seconds, *keys),
+            ).fetchone() is not None
+            if not duplicate:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO handled_events (event_key, handled_at) VALUES (?, ?)",
+                    [(key, now) for key in keys],
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._metrics["duplicates" if duplicate else "accepted"] += 1
+            self._claims += 1
+            prune = self._claims % self.PRUNE_EVERY == 0
+        if prune:
+            connection.execute("DELETE FROM handled_events WHERE handled_at < ?", (now - self.ttl_seconds,))
+        return not duplicate
+
+    def stats(self) -> Dict[str, int]:
+        keys = self._connection().execute("SELECT COUNT(*) FROM handled_events").fetchone()[0]
+        with self._lock:
+            return {"keys": keys, **self._metrics}
+
+
+def create_event_deduplicator() -> EventDeduplicator:
+    """Create the event deduplicator configured through environment variables"""
+    backend = config.EVENT_DEDUP_BACKEND
+    if backend == "memory":
+        return InMemoryEventDeduplicator()
+    if backend == "sqlite":
+        logger.info(f"Using SQLite event deduplication at {config.EVENT_DEDUP_PATH}")
+        return SQLiteEventDeduplicator()
+    raise ValueError(f"Unknown EVENT_DEDUP_BACKEND: {backend} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Bounded worker pool for Slack message processing
+Different threads run in parallel, messages of the same thread run in order
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from agent_runtime import config
+from agent_runtime.metrics import QUEUE_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# (fn, args, kwargs, caller context, submit time)
+_Job = Tuple[Callable[..., Any], tuple, dict, contextvars.Context, float]
+
+
+class ThreadDispatcher:
+    """Runs jobs on a bounded pool, serialized per key (e.g. thread_ts)"""
+
+    def __init__(
+        self,
+        max_workers: int = config.AGENT_MAX_WORKERS,
+        max_queue_depth: int = config.AGENT_MAX_QUEUE_DEPTH,
+    ):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-worker")
+        # key -> jobs still to run; a key is present while one of its jobs is queued or running
+        self._queues: Dict[str, Deque[_Job]] = {}
+        self._pending = 0
+        self._rejected = 0
+        # Jobs dropped because the pool was shut down before they could run
+        self._dropped = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def submit(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> bool:
+        """Queue fn for key; returns False if the queue depth limit is reached"""
+        with self._lock:
+            if self._closed or self._pending >= self.max_queue_depth:
+                self._rejected += 1
+                return False
+            self._pending += 1
+            job = (fn, args, kwargs, contextvars.copy_context(), time.perf_counter())
+            queue = self._queues.get(key)
+            if queue is not None:
+                # A job for this key is already scheduled, it will pick this one up in order
+                queue.append(job)
+                return True
+            self._queues[key] = deque([job])
+        self._schedule(key)
+        return True
+
+    def _run_next(self, key: str) -> None:
+        with self._lock:
+            fn, args, kwargs, context, submitted_at = self._queues[key].popleft()
+        QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted_at)
+        try:
+            # Run in the submitter's context so tracing context follows the job
+            context.run(fn, *args, **kwargs)
+        except Exception:
+            logger.exception(f"Unhandled error processing job for {key}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._idle.notify_all()
+                has_more = bool(self._queues[key])
+                if not has_more:
+                    del self._queues[key]
+        if has_more:
+            # Re-queue instead of looping so a busy thread doesn't monopolize a worker
+            self._schedule(key)
+
+    def _schedule(self, key: str) -> None:
+        """Run the key's next job on the pool, or drop its queue if the pool was shut down"""
+        try:
+            self._executor.submit(self._run_next, key)
+        except RuntimeError:
+            with self._lock:
+                dropped = len(self._queues.pop(key, ()))
+                self._dropped += dropped
+                self._pending -= dropped
+                if self._pending == 0:
+                    self._idle.notify_all()
+            logger.warning(f"Dispatcher shut down, dropped {dropped} queued jobs for {key}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return pending jobs, active keys, rejected submissions and jobs dropped at shutdown"""
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "active_keys": len(self._queues),
+                "rejected": self._rejected,
+                "dropped": self._dropped,
+            }
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """Stop the pool, optionally waiting up to timeout for queued jobs; True if drained"""
+        drained = True
+        with self._lock:
+            self._closed = True
+            if wait:
+                drained = self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+        self._executor.shutdown(wait=False)
+        return drained
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compact conversation history
+Finished turns are kept as slim records (role and text, plus a short note of
+the tool results the answer used) instead of full LangChain messages with
+provider metadata, tool calls and tool outputs; they are turned back into
+messages only when the model is called
+"""
+
+from typing import Any, Iterable, List, Optional, Sequence
+
+from agent_runtime import config
+
+
+class HistoryEntry:
+    """One message of a finished turn, reduced to what the model needs again
+
+    type mirrors the LangChain message type ("human" or "ai") and content its
+    text, so entries can be handled like messages (context window, summaries).
+    """
+
+    __slots__ = ("type", "content", "tools")
+
+    def __init__(self, type: str, content: str, tools: Optional[str] = None):
+        self.type = type
+        self.content = content
+        # Note of the tool results behind an answer, e.g. "get_current_datetime: {...}"
+        self.tools = tools
+
+    def __eq__(self, other: Any) -> bool:
+        return (
+            isinstance(other, HistoryEntry)
+            and (self.type, self.content, self.tools) == (other.type, other.content, other.tools)
+        )
+
+    def __repr__(self) -> str:
+        return f"HistoryEntry({self.type!r}, {self.content!r}, tools={self.tools!r})"
+
+
+def _text(message: Any) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: max(0, limit - 1)] + "…"
+
+
+def compact(messages: Iterable[Any], tool_note_chars: int = config.HISTORY_TOOL_NOTE_CHARS) -> List[Any]:
+    """Compact finished turns: user questions and final answers only
+
+    Tool-call requests and tool results are dropped; the results are folded
+    into a note on the answer that follows them (none if tool_note_chars is 0).
+    Entries already compacted pass through unchanged.
+    """
+    compacted: List[Any] = []
+    notes: List[str] = []
+    for message in messages:
+        if isinstance(message, HistoryEntry):
+            compacted.append(message)
+        elif message.type == "human":
+            compacted.append(HistoryEntry("human", _text(message)))
+            notes = []
+        elif message.type == "tool":
+            if tool_note_chars > 0:
+                notes.append(f"{message.name}: {message.content}")
+        elif message.type == "ai" and not message.tool_calls:
+            tools = _truncate("; ".join(notes), tool_note_chars) if notes else None
+            compacted.append(HistoryEntry("ai", _text(message), tools))
+            notes = []
+    return compacted
+
+
+def rehydrate(entries: Sequence[Any]) -> List[Any]:
+    """LangChain messages for the model (messages that were never compacted pass through)"""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    messages = []
+    for entry in entries:
+        if not isinstance(entry, HistoryEntry):
+            messages.append(entry)
+        elif entry.type == "human":
+            messages.append(HumanMessage(content=entry.content))
+        else:
+            messages.append(AIMessage(content=entry.content))
+    return messages
+
+
+def tool_notes(entries: Sequence[Any]) -> List[str]:
+    """Tool result notes of the compacted answers, oldest first"""
+    return [entry.tools for entry in entries if isinstance(entry, HistoryEntry) and entry.tools]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Logging for the hot path
+Level-gated, sampled logging through a queue so handlers never block the
+message workers, plus helpers to format lazily and keep user content out
+of the logs
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Any, Callable, Optional
+
+from agent_runtime import config
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Third-party loggers that dump full request/response bodies at DEBUG
+_BODY_LOGGERS = ("slack_sdk", "slack_bolt", "httpx", "httpcore", "urllib3")
+
+
+class Lazy:
+    """Defers an expensive log argument until the record is actually emitted"""
+
+    __slots__ = ("_fn",)
+
+    def __init__(self, fn: Callable[[], Any]):
+        self._fn = fn
+
+    def __str__(self) -> str:
+        return str(self._fn())
+
+
+class Redacted:
+    """User text shown as length + short hash unless LOG_USER_CONTENT is enabled"""
+
+    __slots__ = ("_text",)
+
+    def __init__(self, text: Any):
+        self._text = text
+
+    def __str__(self) -> str:
+        text = self._text if isinstance(self._text, str) else str(self._text)
+        if config.LOG_USER_CONTENT:
+            return text if len(text) <= 200 else text[:200] + "..."
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+        return f"<{len(text)} chars #{digest}>"
+
+
+def redact(text: Any) -> Redacted:
+    """Wrap user content for logging (formatted only if the record is emitted)"""
+    return Redacted(text)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG/INFO records, always keeps warnings and errors"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def configure_logging(
+    level: str = config.LOG_LEVEL,
+    log_format: str = config.LOG_FORMAT,
+    sample_rate: float = config.LOG_SAMPLE_RATE,
+) -> None:
+    """Route all logging through a queue drained by a background thread"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+    if not config.LOG_USER_CONTENT:
+        for name in _BODY_LOGGERS:
+            logging.getLogger(name).setLevel(max(logging.INFO, root.level))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
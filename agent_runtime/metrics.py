@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Metrics and request tracing
+Prometheus-style counters/histograms served on a local HTTP endpoint, plus
+per-request traces that add up where the time of each Slack message went
+"""
+
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from agent_runtime import config
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from fast cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(labelnames: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in self._values.items()
+            ]
+
+
+class Gauge(_Metric):
+    """Value read from a callback at scrape time (e.g. cache sizes)"""
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> List[str]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.warning(f"Could not collect gauge {self.name}: {e}")
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[0][index] += 1
+                    break
+            data[1] += value
+            data[2] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), **kwargs) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, **kwargs))
+
+    def gauge(self, name: str, help_text: str, callback, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, callback, labelnames))
+
+    def stats_gauge(self, name: str, help_text: str, stats: Callable[[], Dict[str, float]]) -> Gauge:
+        """Expose a component's stats() dict as a gauge with one sample per key"""
+        return self.gauge(
+            name,
+            help_text,
+            lambda: {(key,): value for key, value in stats().items() if isinstance(value, (int, float))},
+            ["stat"],
+        )
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Hot-path metrics shared by the Slack app and the agent
+SLACK_MESSAGES = registry.counter(
+    "slack_messages_total", "Slack messages received, by outcome", ["outcome"])
+RATE_LIMITED = registry.counter(
+    "slack_rate_limited_total", "Messages rejected by rate limiting, by scope", ["scope"])
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "agent_queue_wait_seconds", "Time a message waited for a worker")
+SPAN_SECONDS = registry.histogram(
+    "agent_span_seconds", "Duration of traced operations (agent run, LLM call, tools, Slack API)", ["span"])
+LLM_TOKENS = registry.counter(
+    "agent_llm_tokens_total", "LLM tokens, by direction (input/output, cached = input served from the prompt cache)", ["direction"])
+LLM_CACHED_TOKENS = registry.histogram(
+    "agent_llm_cached_tokens", "Prompt tokens served from the provider's prefix cache, per LLM call",
+    buckets=(0, 100, 250, 500, 1000, 2000, 4000, 8000))
+PREFILTER_DECISIONS = registry.counter(
+    "agent_prefilter_total", "Pre-filter decisions (off_topic, simple, complex)", ["outcome"])
+LLM_CALLS = registry.counter(
+    "agent_llm_calls_total", "LLM calls, by model and outcome (ok/error/timeout/circuit_open/invalid)", ["model", "outcome"])
+DEGRADED_RESPONSES = registry.counter(
+    "agent_degraded_responses_total", "Answers given without the LLM, by source (cache/canned)", ["source"])
+RUN_LLM_STEPS = registry.histogram(
+    "agent_run_llm_steps", "LLM calls per agent run", buckets=(1, 2, 3, 4, 5, 8, 13))
+RUN_BUDGET_EXCEEDED = registry.counter(
+    "agent_run_budget_exceeded_total",
+    "Agent runs stopped by their budget, by reason (llm_steps/tool_calls/time/input_tokens/output_tokens)",
+    ["reason"])
+TOOL_CACHE = registry.counter(
+    "agent_tool_cache_total", "Tool result cache lookups, by tool and result (hit/miss)", ["tool", "result"])
+TOOL_SECONDS = registry.histogram(
+    "agent_tool_seconds", "Tool execution latency, by tool and status", ["tool", "status"])
+
+
+class RequestTrace:
+    """Per-message timings, accumulated by span name"""
+
+    def __init__(self, **attributes):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.attributes = attributes
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.tokens = {"input": 0, "output": 0, "cached": 0}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def add_tokens(self, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> None:
+        with self._lock:
+            self.tokens["input"] += input_tokens
+            self.tokens["output"] += output_tokens
+            self.tokens["cached"] += cached_tokens
+
+    def summary(self) -> Dict[str, object]:
+        """Flat dict suitable for a structured log line"""
+        with self._lock:
+            return {
+                "trace_id": self.trace_id,
+                **self.attributes,
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self.durations.items()},
+                "tokens_in": self.tokens["input"],
+                "tokens_out": self.tokens["output"],
+                "tokens_cached": self.tokens["cached"],
+            }
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar(
+    "current_trace", default=None)
+
+
+def start_trace(**attributes) -> RequestTrace:
+    """Start a trace for the current request (propagated with contextvars)"""
+    trace = RequestTrace(**attributes)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """The trace of the request being processed, if any"""
+    return _current_trace.get()
+
+
+def _get_tracer():
+    if not config.OTEL_ENABLED:
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return None
+    return trace.get_tracer("slack-animales-agent")
+
+
+_tracer = _get_tracer()
+
+
+@contextmanager
+def trace_span(name: str, **attributes) -> Iterator[None]:
+    """Time a block: feeds agent_span_seconds, the current trace and OpenTelemetry"""
+    otel_span = _tracer.start_as_current_span(name, attributes=attributes) if _tracer else nullcontext()
+    with otel_span:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            SPAN_SECONDS.observe(seconds, span=name)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.add(name, seconds)
+
+
+def llm_usage(message) -> Tuple[int, int, int]:
+    """(input, output, cached) tokens reported in an AIMessage's usage metadata"""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return 0, 0, 0
+    # Part of the input served from the provider's prompt prefix cache (billed at a discount)
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0), cached_tokens
+
+
+def record_llm_usage(message) -> None:
+    """Count the tokens reported in an AIMessage's usage metadata"""
+    if not getattr(message, "usage_metadata", None):
+        return
+    input_tokens, output_tokens, cached_tokens = llm_usage(message)
+    LLM_TOKENS.inc(input_tokens, direction="input")
+    LLM_TOKENS.inc(output_tokens, direction="output")
+    LLM_TOKENS.inc(cached_tokens, direction="cached")
+    LLM_CACHED_TOKENS.observe(cached_tokens)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_tokens(input_tokens, output_tokens, cached_tokens)
+
+
+class TracedClient:
+    """Proxy around a Slack WebClient that times every API method call"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def traced(*args, **kwargs):
+            with trace_span(f"slack.{name}"):
+                return attribute(*args, **kwargs)
+
+        return traced
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are frequent, keep them out of the application log
+        pass
+
+
+def start_metrics_server(host: str = config.METRICS_HOST, port: int = config.METRICS_PORT) -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"📊 Metrics available at http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Local pre-filter for incoming questions
+Keyword checks that run in-process before the agent: answer clearly
+off-topic questions with a canned redirect and tell simple questions from
+complex ones so they can go to different models
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from agent_runtime import config
+from agent_runtime.response_cache import normalize_question
+
+# Frequent Spanish words (normalized) used to pick the language of the redirect
+_SPANISH_WORDS = frozenset(
+    "que como cual cuales cuanto cuantos donde por para porque el la los las un una de del es son "
+    "y o en con mi tu hola gracias puedes sabes hay".split()
+)
+_SPANISH_CHARACTERS = re.compile(r"[¿¡ñáéíóú]", re.IGNORECASE)
+
+# Wording that asks for an explanation or comparison rather than a single fact
+_COMPLEX_PHRASES = (
+    "por que", "explica", "explicame", "compara", "diferencia", "diferencias", "como funciona",
+    "ventajas", "analiza", "why", "explain", "compare", "difference", "differences", "how does",
+    "pros and cons", "analyze",
+)
+
+
+def words(text: str) -> Set[str]:
+    """Normalized words of a text, plus their singular forms (plural "s"/"es" stripped)"""
+    result = set()
+    for word in normalize_question(text).split():
+        result.add(word)
+        if len(word) > 3 and word.endswith("es"):
+            result.add(word[:-2])
+        if len(word) > 3 and word.endswith("s"):
+            result.add(word[:-1])
+    return result
+
+
+def detect_language(text: str) -> str:
+    """"es" or "en", from accents/¿¡ and common Spanish words"""
+    if _SPANISH_CHARACTERS.search(text):
+        return "es"
+    return "es" if words(text) & _SPANISH_WORDS else "en"
+
+
+def _phrases_in(normalized: str, phrases: Iterable[str]) -> int:
+    padded = f" {normalized} "
+    return sum(1 for phrase in phrases if f" {phrase} " in padded)
+
+
+class TopicPrefilter:
+    """Answers clearly off-topic questions without calling the model
+
+    A question is off topic only if it mentions one of off_topic_words and
+    none of topic_words; anything ambiguous goes to the model as before.
+    Callable: returns the redirect in the question's language, or None.
+    """
+
+    def __init__(
+        self,
+        topic_words: Iterable[str],
+        off_topic_words: Iterable[str],
+        redirects: Dict[str, str],
+    ):
+        self.topic_words: FrozenSet[str] = frozenset(topic_words)
+        self.off_topic_words: FrozenSet[str] = frozenset(off_topic_words)
+        self.redirects = redirects
+
+    def __call__(self, text: str) -> Optional[str]:
+        question_words = words(text)
+        if question_words & self.topic_words or not question_words & self.off_topic_words:
+            return None
+        return self.redirects.get(detect_language(text)) or next(iter(self.redirects.values()))
+
+
+def classify_complexity(text: str, min_words: int = config.MODEL_COMPLEX_MIN_WORDS) -> str:
+    """"complex" for long, multi-part or explanatory questions, "simple" otherwise"""
+    normalized = normalize_question(text)
+    if len(normalized.split()) >= min_words:
+        return "complex"
+    if text.count("?") > 1 or _phrases_in(normalized, _COMPLEX_PHRASES):
+        return "complex"
+    return "simple"
+
+
+def model_for(complexity: str) -> Optional[str]:
+    """Model name configured for a complexity tier, None to keep the agent's model"""
+    model = config.MODEL_COMPLEX if complexity == "complex" else config.MODEL_SIMPLE
+    return model or None
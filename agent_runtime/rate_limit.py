@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Rate limiting and load shedding for the Slack integration
+Token buckets keyed on user/channel/workspace, and a global cap on the
+number of agent runs in flight
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from agent_runtime import config
+
+
+class TokenBucket:
+    """Bucket of `burst` tokens refilled at `rate` tokens per second"""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, rate: float, burst: float, now: float) -> None:
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """Token-bucket limits for several scopes, consumed all-or-nothing
+
+    limits maps a scope name (e.g. "user") to (tokens per second, burst).
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], max_keys: int = 10000):
+        self.limits = limits
+        self.max_keys = max_keys
+        # (scope, key) -> bucket, least recently used first
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"allowed": 0, "limited": 0}
+
+    def acquire(self, keys: Dict[str, Optional[str]]) -> Optional[Tuple[str, float]]:
+        """Take one token per scope; returns None if allowed, else (scope, seconds to wait)"""
+        with self._lock:
+            now = time.monotonic()
+            buckets = []
+            for scope, key in keys.items():
+                if not key or scope not in self.limits:
+                    continue
+                rate, burst = self.limits[scope]
+                bucket = self._buckets.get((scope, key))
+                if bucket is None:
+                    bucket = self._buckets[(scope, key)] = TokenBucket(burst, now)
+                else:
+                    self._buckets.move_to_end((scope, key))
+                    bucket.refill(rate, burst, now)
+                if bucket.tokens < 1:
+                    self._metrics["limited"] += 1
+                    return scope, (1 - bucket.tokens) / rate if rate > 0 else float("inf")
+                buckets.append(bucket)
+            for bucket in buckets:
+                bucket.tokens -= 1
+            # Idle buckets are full again, so forgetting the oldest ones is harmless
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            self._metrics["allowed"] += 1
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"keys": len(self._buckets), **self._metrics}
+
+
+def create_rate_limiter() -> Optional[RateLimiter]:
+    """Create the Slack rate limiter from environment variables, or None if disabled"""
+    if not config.RATE_LIMIT_ENABLED:
+        return None
+    return RateLimiter({
+        "user": (config.RATE_LIMIT_USER_PER_MINUTE / 60, config.RATE_LIMIT_USER_BURST),
+        "channel": (config.RATE_LIMIT_CHANNEL_PER_MINUTE / 60, config.RATE_LIMIT_CHANNEL_BURST),
+        "workspace": (config.RATE_LIMIT_WORKSPACE_PER_MINUTE / 60, config.RATE_LIMIT_WORKSPACE_BURST),
+    })
+
+
+class ConcurrencyLimiter:
+    """Caps how many agent runs are in flight at once"""
+
+    def __init__(self, max_concurrent: int = config.AGENT_MAX_CONCURRENT_RUNS):
+        self.max_concurrent = max_concurrent
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._timeouts = 0
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free right now"""
+        if not self._semaphore.acquire(blocking=False):
+            return False
+        with self._lock:
+            self._active += 1
+        return True
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait up to timeout seconds for a slot"""
+        with self._lock:
+            self._waiting += 1
+        acquired = self._semaphore.acquire(timeout=timeout)
+        with self._lock:
+            self._waiting -= 1
+            if acquired:
+                self._active += 1
+            else:
+                self._timeouts += 1
+        return acquired
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "active": self._active,
+                "waiting": self._waiting,
+                "timeouts": self._timeouts,
+            }
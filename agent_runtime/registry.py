@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Agent registry
+Several domain agents (prompt, tools, model) served by one process: each
+graph is compiled once on first use and shared by every thread, and a
+message is routed to an agent by channel or by a cheap keyword classifier
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from agent_runtime import config
+from agent_runtime.response_cache import normalize_question
+
+logger = logging.getLogger(__name__)
+
+
+class AgentSpec(NamedTuple):
+    """Definition of a domain agent"""
+
+    name: str
+    system_prompt: str
+    # Returns the agent's tools; called once, when the graph is built
+    load_tools: Callable[[], List[Any]]
+    # Chat model name, None for the default model
+    model: Optional[str] = None
+    description: str = ""
+    # Normalized words that route a message to this agent
+    keywords: Tuple[str, ...] = ()
+    # Local check run before the model: returns a canned answer for the question, or None
+    prefilter: Optional[Callable[[str], Optional[str]]] = None
+
+
+def parse_channel_routes(routes: str) -> Dict[str, str]:
+    """Parse "C0123=animales,C0456=otro" into {channel_id: agent name}"""
+    parsed = {}
+    for route in routes.split(","):
+        if not route.strip():
+            continue
+        channel_id, separator, name = route.partition("=")
+        if not separator or not channel_id.strip() or not name.strip():
+            raise ValueError(f"Invalid AGENT_CHANNEL_ROUTES entry: {route!r} (expected CHANNEL=agent)")
+        parsed[channel_id.strip()] = name.strip()
+    return parsed
+
+
+class AgentRegistry:
+    """Agent specs by name, with their compiled graphs built lazily and cached
+
+    build(spec) compiles the graph of an agent; it runs at most once per agent.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[AgentSpec], Any],
+        default: str = config.AGENT_DEFAULT,
+        channel_routes: Optional[Dict[str, str]] = None,
+    ):
+        self._build = build
+        self.default = default
+        self.channel_routes = (
+            parse_channel_routes(config.AGENT_CHANNEL_ROUTES) if channel_routes is None else channel_routes
+        )
+        self._specs: Dict[str, AgentSpec] = {}
+        self._graphs: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, spec: AgentSpec) -> AgentSpec:
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._graphs.pop(spec.name, None)
+        return spec
+
+    def names(self) -> Sequence[str]:
+        return list(self._specs)
+
+    def spec(self, name: Optional[str] = None) -> AgentSpec:
+        name = name or self.default
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise KeyError(f"Unknown agent: {name} (registered: {', '.join(self._specs) or 'none'})")
+
+    def graph(self, name: Optional[str] = None):
+        """The compiled graph of an agent (built once, on first use)"""
+        name = name or self.default
+        graph = self._graphs.get(name)
+        if graph is None:
+            with self._lock:
+                graph = self._graphs.get(name)
+                if graph is None:
+                    spec = self.spec(name)
+                    logger.info(f"Building agent graph: {name}")
+                    graph = self._graphs[name] = self._build(spec)
+        return graph
+
+    def clear(self) -> None:
+        """Drop the compiled graphs (they are rebuilt on next use)"""
+        with self._lock:
+            self._graphs.clear()
+
+    def select(self, channel_id: Optional[str] = None, text: str = "") -> str:
+        """Pick the agent for a message: channel route, then keyword match, then the default"""
+        routed = self.channel_routes.get(channel_id) if channel_id else None
+        if routed in self._specs:
+            return routed
+        if len(self._specs) > 1 and text:
+            words = set(normalize_question(text).split())
+            best, best_score = self.default, 0
+            for spec in self._specs.values():
+                score = sum(1 for keyword in spec.keywords if keyword in words)
+                if score > best_score:
+                    best, best_score = spec.name, score
+            return best
+        return self.default
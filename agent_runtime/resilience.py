@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Resilience for LLM calls
+Per-message deadlines, a circuit breaker per model and a fallback model, so
+a slow or failing upstream can't hold workers for long
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+from agent_runtime import config
+from agent_runtime.metrics import LLM_CALLS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LLMUnavailableError(Exception):
+    """No model could answer within the deadline"""
+
+
+# Provider-side failures by exception class name, so this works whatever client
+# library (and version) raised them: langchain-core's classified model errors,
+# google-genai / google-api-core errors and httpx transport errors
+_UPSTREAM_ERROR_NAMES = frozenset({
+    "ModelAPIError", "ModelRateLimitError", "ModelTimeoutError", "ModelConnectionError",
+    "ServerError", "ServiceUnavailable", "InternalServerError", "TooManyRequests",
+    "ResourceExhausted", "DeadlineExceeded", "TransportError", "TimeoutException",
+})
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Whether a failed LLM call is the provider's fault (outage, overload, timeout, network)
+
+    Anything else, such as a bad request, missing credentials or a bug in our
+    code, says nothing about the model's health and is not worth a fallback.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "code", None)
+    if not isinstance(status, int):
+        status = getattr(error, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 600:
+        return status in (408, 429) or status >= 500
+    return any(cls.__name__ in _UPSTREAM_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def deadline_after(seconds: float = config.AGENT_DEADLINE_SECONDS) -> float:
+    """Deadline (time.monotonic() timestamp) the given seconds from now"""
+    return time.monotonic() + seconds
+
+
+def remaining(deadline: Optional[float], limit: float) -> float:
+    """Seconds left until the deadline, at most limit"""
+    if deadline is None:
+        return limit
+    return min(limit, deadline - time.monotonic())
+
+
+class CircuitBreaker:
+    """Opens after too many failed or slow calls among the last `window`
+
+    While open, calls are rejected right away. After reset_seconds one trial
+    call is let through (half open): success closes the circuit again,
+    failure keeps it open for another reset_seconds.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = config.CIRCUIT_FAILURE_THRESHOLD,
+        window: int = config.CIRCUIT_WINDOW,
+        slow_call_seconds: float = config.CIRCUIT_SLOW_CALL_SECONDS,
+        reset_seconds: float = config.CIRCUIT_RESET_SECONDS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+        # True for each failed or slow call among the last `window` calls
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._metrics = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go through now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._metrics["rejected"] += 1
+            return False
+
+    def release(self) -> None:
+        """Give back an allowed call whose outcome says nothing about the model's health"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record(self, ok: bool, seconds: float = 0.0) -> None:
+        """Record the outcome of an allowed call"""
+        failed = not ok or seconds >= self.slow_call_seconds
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if failed:
+                    self._open()
+                else:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            if self._state == self.CLOSED and sum(self._outcomes) >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._metrics["opened"] += 1
+        logger.warning(f"Circuit for {self.name} opened")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "open": int(self._state != self.CLOSED),
+                "recent_failures": sum(self._outcomes),
+                **self._metrics,
+            }
+
+
+class ResilientLLM:
+    """Calls a model under a deadline, with a circuit breaker per model and a fallback
+
+    Only upstream failures (see is_upstream_failure) and timeouts count
+    against a model and move on to the fallback; other errors are raised as
+    they are, so a misconfiguration fails loudly instead of opening circuits.
+
+    invoke(model_name) performs the actual call; it runs on a worker thread
+    so the caller stops waiting at the deadline even if the HTTP call hangs.
+    At most max_workers calls run at once; callers beyond that wait for a
+    slot (up to their deadline) before the call and its timeout start, so a
+    busy pool never shows up as slow or failing models.
+    """
+
+    def __init__(
+        self,
+        fallback_model: Optional[str] = config.LLM_FALLBACK_MODEL or None,
+        call_timeout: float = config.LLM_TIMEOUT_SECONDS,
+        max_workers: int = config.LLM_MAX_CONCURRENT_CALLS,
+    ):
+        self.fallback_model = fallback_model
+        self.call_timeout = call_timeout
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+        # One slot per worker thread, held until the call returns (even after its caller timed out)
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(model)
+            return breaker
+
+    def call(self, invoke: Callable[[str], T], model: str, deadline: Optional[float] = None) -> T:
+        """Try the model, then the fallback; raises LLMUnavailableError if neither answers"""
+        models = [model]
+        if self.fallback_model and self.fallback_model != model:
+            models.append(self.fallback_model)
+        last_error: Optional[BaseException] = None
+        for candidate in models:
+            if remaining(deadline, self.call_timeout) <= 0:
+                raise LLMUnavailableError("deadline exceeded") from last_error
+            if not self._slots.acquire(timeout=None if deadline is None else max(0.0, deadline - time.monotonic())):
+                raise LLMUnavailableError("deadline exceeded waiting for a free LLM call slot") from last_error
+            timeout = remaining(deadline, self.call_timeout)
+            breaker = self.breaker(candidate)
+            if timeout <= 0 or not breaker.allow():
+                self._slots.release()
+                if timeout <= 0:
+                    raise LLMUnavailableError("deadline exceeded") from last_error
+                LLM_CALLS.inc(model=candidate, outcome="circuit_open")
+                last_error = LLMUnavailableError(f"circuit for {candidate} is open")
+                continue
+            start = time.monotonic()
+            # The worker thread keeps the caller's context (trace, callbacks)
+            future = self._executor.submit(self._run, contextvars.copy_context(), invoke, candidate)
+            try:
+                result = future.result(timeout=timeout)
+            except FutureTimeoutError as e:
+                breaker.record(False, time.monotonic() - start)
+                LLM_CALLS.inc(model=candidate, outcome="timeout")
+                logger.warning(f"LLM call to {candidate} timed out after {timeout:.1f}s")
+                last_error = e
+                continue
+            except Exception as e:
+                if not is_upstream_failure(e):
+                    breaker.release()
+                    LLM_CALLS.inc(model=candidate, outcome="invalid")
+                    raise
+                breaker.record(False, time.monotonic() - start)
+                LLM_CALLS.inc(model=candidate, outcome="error")
+                logger.warning(f"LLM call to {candidate} failed: {e}")
+                last_error = e
+                continue
+            breaker.record(True, time.monotonic() - start)
+            LLM_CALLS.inc(model=candidate, outcome="ok")
+            return result
+        raise LLMUnavailableError(f"no model available: {last_error!r}") from last_error
+
+    def _run(self, context: contextvars.Context, invoke: Callable[[str], T], model: str) -> T:
+        try:
+            return context.run(invoke, model)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {
+            f"{model}_{stat}": value
+            for model, breaker in breakers
+            for stat, value in breaker.stats().items()
+        }
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Response cache for repeated questions
+Exact match on the normalized question, with an optional embedding lookup
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from agent_runtime import config
+
+logger = logging.getLogger(__name__)
+
+# text -> embedding vector
+Embedder = Callable[[str], List[float]]
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, strip accents, punctuation and repeated whitespace"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _unit_vector(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+class _CachedResponse(NamedTuple):
+    answer: str
+    expires_at: float
+    vector: Optional[List[float]]
+    pinned: bool = False
+
+
+class ResponseCache:
+    """LRU + TTL cache of answers keyed by normalized question"""
+
+    _MAX_PENDING_VECTORS = 128
+
+    def __init__(
+        self,
+        max_entries: int = config.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = config.RESPONSE_CACHE_TTL_SECONDS,
+        embed: Optional[Embedder] = None,
+        similarity_threshold: float = config.RESPONSE_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _CachedResponse]" = OrderedDict()
+        # Embeddings computed on a miss, reused when the answer is stored
+        self._pending_vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits_exact": 0,
+            "hits_semantic": 0,
+            "misses": 0,
+            "bypasses": 0,
+            "evictions": 0,
+        }
+
+    def get(self, question: str) -> Optional[str]:
+        """Return a cached answer for the question, or None"""
+        key = normalize_question(question)
+        with self._lock:
+            now = time.monotonic()
+            entry = self._lookup(key, now)
+            if entry is not None:
+                self._metrics["hits_exact"] += 1
+                return entry.answer
+            if self.embed is None:
+                self._metrics["misses"] += 1
+                return None
+
+        # Embedding can be slow (remote call), don't hold the lock while computing it
+        vector = self._embed(question)
+        with self._lock:
+            if vector is not None:
+                match = self._nearest(vector, time.monotonic())
+                if match is not None:
+                    self._metrics["hits_semantic"] += 1
+                    return match.answer
+                self._pending_vectors[key] = vector
+                while len(self._pending_vectors) > self._MAX_PENDING_VECTORS:
+                    self._pending_vectors.popitem(last=False)
+            self._metrics["misses"] += 1
+            return None
+
+    def put(self, question: str, answer: str, pinned: bool = False) -> None:
+        """Cache the answer for a question
+
+        Pinned entries (warmed-up answers) never expire nor get evicted, they
+        are only replaced by a newer answer for the same question.
+        """
+        key = normalize_question(question)
+        with self._lock:
+            vector = self._pending_vectors.pop(key, None)
+        if vector is None and self.embed is not None:
+            vector = self._embed(question)
+        with self._lock:
+            self._entries[key] = _CachedResponse(answer, time.monotonic() + self.ttl_seconds, vector, pinned)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next((key for key, entry in self._entries.items() if not entry.pinned), None)
+                if oldest is None:
+                    break
+                del self._entries[oldest]
+                self._metrics["evictions"] += 1
+
+    def record_bypass(self) -> None:
+        """Count a lookup that was skipped (e.g. a follow-up message in a thread)"""
+        with self._lock:
+            self._metrics["bypasses"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Return entry count, hit/miss counters and hit rate"""
+        with self._lock:
+            hits = self._metrics["hits_exact"] + self._metrics["hits_semantic"]
+            lookups = hits + self._metrics["misses"]
+            return {
+                "entries": len(self._entries),
+                **self._metrics,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def _lookup(self, key: str, now: float) -> Optional[_CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now and not entry.pinned:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, vector: List[float], now: float) -> Optional[_CachedResponse]:
+        best_key, best_score = None, self.similarity_threshold
+        for key, entry in self._entries.items():
+            if entry.vector is None or (entry.expires_at <= now and not entry.pinned):
+                continue
+            score = sum(a * b for a, b in zip(vector, entry.vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self._lookup(best_key, now) if best_key is not None else None
+
+    def _embed(self, question: str) -> Optional[List[float]]:
+        try:
+            return _unit_vector(self.embed(question))
+        except Exception as e:
+            logger.warning(f"Could not embed question for the response cache: {e}")
+            return None
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Slack Web API I/O for the Slack integration
+A shared WebClient that waits out rate limits, and a background sender that
+keeps status updates and other best-effort calls off the message workers,
+coalescing redundant status changes
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from slack_sdk import WebClient
+from slack_sdk.http_retry.builtin_handlers import ConnectionErrorRetryHandler, RateLimitErrorRetryHandler
+
+from agent_runtime import config
+from agent_runtime.metrics import TracedClient
+
+logger = logging.getLogger(__name__)
+
+
+def create_web_client(token: Optional[str] = None) -> WebClient:
+    """WebClient shared by the whole app, retrying connection errors and HTTP 429 (Retry-After)"""
+    return WebClient(
+        token=token or os.environ.get("SLACK_BOT_TOKEN"),
+        base_url=config.SLACK_API_BASE_URL,
+        retry_handlers=[
+            ConnectionErrorRetryHandler(),
+            RateLimitErrorRetryHandler(max_retry_count=config.SLACK_API_MAX_RETRIES),
+        ],
+    )
+
+
+class _StatusSlot:
+    """Status state of one assistant thread"""
+
+    __slots__ = ("pending", "sent", "sending")
+
+    def __init__(self):
+        self.pending: Optional[str] = None
+        self.sent: Optional[str] = None
+        self.sending = False
+
+
+class SlackIO:
+    """Background Slack calls: statuses are coalesced, other calls are fire-and-forget
+
+    Only the latest requested status of a thread is sent, and a status equal
+    to the one already shown is skipped. Slack clears an assistant thread's
+    status when the app replies, so call before_reply() before posting a
+    reply: it drops pending statuses so none lands after the answer.
+    """
+
+    def __init__(self, client, max_workers: int = config.SLACK_IO_MAX_WORKERS):
+        # Background calls still feed the agent_span_seconds metric
+        self.client = TracedClient(client)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="slack-io")
+        # (channel_id, thread_ts) -> status state
+        self._statuses: Dict[Tuple[str, str], _StatusSlot] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._metrics = {"status_sent": 0, "status_coalesced": 0, "errors": 0}
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Run a Slack call in the background; errors are logged, not raised"""
+        return self._executor.submit(self._call, fn, *args, **kwargs)
+
+    def call(self, method: str, **kwargs) -> Future:
+        """Fire-and-forget Web API method call, e.g. call("assistant_threads_setSuggestedPrompts", ...)"""
+        return self.submit(getattr(self.client, method), **kwargs)
+
+    def set_status(self, channel_id: str, thread_ts: str, status: str) -> None:
+        """Request an assistant thread status; sent in the background"""
+        key = (channel_id, thread_ts)
+        with self._lock:
+            slot = self._statuses.get(key)
+            if slot is None:
+                slot = self._statuses[key] = _StatusSlot()
+            if slot.pending is not None or status == slot.sent:
+                # Replaces a status that was not sent yet, or is already shown
+                self._metrics["status_coalesced"] += 1
+                if slot.pending is not None or slot.sending:
+                    slot.pending = status
+                return
+            slot.pending = status
+            if slot.sending:
+                return
+            slot.sending = True
+        self._executor.submit(self._drain_status, key)
+
+    def before_reply(self, channel_id: str, thread_ts: str, timeout: float = 5.0) -> None:
+        """Drop pending statuses of a thread and wait for one being sent"""
+        key = (channel_id, thread_ts)
+        with self._lock:
+            slot = self._statuses.get(key)
+            if slot is None:
+                return
+            if slot.pending is not None:
+                slot.pending = None
+                self._metrics["status_coalesced"] += 1
+            self._idle.wait_for(lambda: not slot.sending, timeout=timeout)
+            # The reply clears the status on Slack's side
+            if self._statuses.get(key) is slot:
+                del self._statuses[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"threads": len(self._statuses), **self._metrics}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self._metrics["errors"] += 1
+            logger.warning(f"Background Slack call failed: {e}")
+            return None
+
+    def _drain_status(self, key: Tuple[str, str]) -> None:
+        channel_id, thread_ts = key
+        while True:
+            with self._lock:
+                slot = self._statuses.get(key)
+                if slot is None or slot.pending is None:
+                    if slot is not None:
+                        slot.sending = False
+                        if slot.sent == "":
+                            # Nothing is shown, no need to remember the thread
+                            del self._statuses[key]
+                    self._idle.notify_all()
+                    return
+                status, slot.pending = slot.pending, None
+                if status == slot.sent:
+                    continue
+            response = self._call(
+                self.client.assistant_threads_setStatus,
+                channel_id=channel_id,
+                thread_ts=thread_ts,
+                status=status,
+            )
+            with self._lock:
+                if response is not None:
+                    slot.sent = status
+                    self._metrics["status_sent"] += 1
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Streaming replies for Slack
+Posts a placeholder message and progressively edits it as tokens arrive
+"""
+
+import logging
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from slack_sdk.errors import SlackApiError
+
+from agent_runtime import config
+
+logger = logging.getLogger(__name__)
+
+# Appended to the partial text while the reply is still being generated
+STREAMING_CURSOR = " ▌"
+
+
+class SlackStreamingReply:
+    """A Slack message that is updated as the agent generates its answer
+
+    Tokens are coalesced: chat.update is called at most once per
+    min_interval seconds and only when at least min_chars new characters
+    arrived, which keeps edits well below Slack's rate limits. With an
+    `io` (SlackIO) the placeholder and intermediate edits are sent in the
+    background, so Slack round trips don't delay the agent.
+    """
+
+    def __init__(
+        self,
+        client,
+        channel_id: str,
+        thread_ts: str,
+        placeholder: str = "🐾 Pensando...",
+        min_interval: float = config.SLACK_STREAM_UPDATE_INTERVAL,
+        min_chars: int = config.SLACK_STREAM_MIN_CHARS,
+        io=None,
+    ):
+        self.client = client
+        self.channel_id = channel_id
+        self.thread_ts = thread_ts
+        self.placeholder = placeholder
+        self.min_interval = min_interval
+        self.min_chars = min_chars
+        self.io = io
+        self.message_ts: Optional[str] = None
+        self._started: Optional[Future] = None
+        self._in_flight: Optional[Future] = None
+        self._text = ""
+        self._sent_length = 0
+        self._last_update = 0.0
+
+    def start(self) -> None:
+        """Post the placeholder message that will be edited later"""
+        if self.io is not None:
+            self._started = self.io.submit(self._post_placeholder)
+        else:
+            self._post_placeholder()
+
+    def _post_placeholder(self) -> None:
+        response = self.client.chat_postMessage(
+            channel=self.channel_id,
+            thread_ts=self.thread_ts,
+            text=self.placeholder,
+        )
+        self._last_update = time.monotonic()
+        self.message_ts = response["ts"]
+
+    def append(self, token: str) -> None:
+        """Add generated text, editing the message if the throttle allows it"""
+        self._text += token
+        if self.message_ts is None:
+            return
+        now = time.monotonic()
+        if now - self._last_update < self.min_interval:
+            return
+        if len(self._text) - self._sent_length < self.min_chars:
+            return
+        if self.io is not None:
+            if self._in_flight is not None and not self._in_flight.done():
+                # The previous edit is still on its way, the next one carries the full text
+                return
+            self._in_flight = self.io.submit(self._update, self._text + STREAMING_CURSOR)
+        else:
+            self._update(self._text + STREAMING_CURSOR)
+        self._sent_length = len(self._text)
+        self._last_update = now
+
+    def finish(self, text: str, timeout: float = 30.0) -> None:
+        """Replace the message with the final text"""
+        # The final edit must not race the placeholder or an intermediate edit
+        for future in (self._started, self._in_flight):
+            if future is not None:
+                future.result(timeout=timeout)
+        if self.message_ts is None:
+            self.client.chat_postMessage(channel=self.channel_id, thread_ts=self.thread_ts, text=text)
+            return
+        self.client.chat_update(channel=self.channel_id, ts=self.message_ts, text=text)
+
+    def _update(self, text: str) -> None:
+        try:
+            self.client.chat_update(channel=self.channel_id, ts=self.message_ts, text=text)
+        except SlackApiError as e:
+            # Intermediate edits are best effort, the next one carries the full text anyway
+            logger.warning(f"Could not update streaming message: {e.response.get('error')}")
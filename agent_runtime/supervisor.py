@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Multi-process supervisor for the Slack app
+Runs N worker processes, each with its own Socket Mode connection. Slack
+spreads events over the open connections, so every Slack thread has an
+owner worker (by a stable hash of thread_ts) and the other workers forward
+its messages there; crashed workers are restarted, and on SIGTERM/SIGINT
+all of them drain their in-flight messages before exiting
+"""
+
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from agent_runtime import config
+
+logger = logging.getLogger(__name__)
+
+# Restart delay doubles after each quick crash, up to this many seconds
+MAX_RESTART_DELAY = 30.0
+# A worker that ran at least this long before exiting restarts without delay
+STABLE_RUN_SECONDS = 60.0
+
+
+def shard_for(key: str, count: int) -> int:
+    """Index of the worker that owns a key (stable across processes and restarts)"""
+    if count <= 1:
+        return 0
+    return zlib.crc32(key.encode("utf-8")) % count
+
+
+class WorkerShard(NamedTuple):
+    """What a worker process needs to know about its siblings"""
+
+    index: int
+    count: int
+    # One inbox per worker: messages of threads it owns, forwarded by the others
+    inboxes: List[Any]
+
+    def owner(self, key: str) -> int:
+        return shard_for(key, self.count)
+
+    def forward(self, key: str, item: Any) -> bool:
+        """Send item to the key's owner; False if this worker owns it"""
+        owner = self.owner(key)
+        if owner == self.index:
+            return False
+        self.inboxes[owner].put(item)
+        return True
+
+
+class _Worker:
+    """A worker slot: its current process and restart bookkeeping"""
+
+    __slots__ = ("process", "started_at", "failures", "restart_at")
+
+    def __init__(self):
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at = 0.0
+
+
+class Supervisor:
+    """Keeps `workers` processes running target(shard) until SIGTERM/SIGINT
+
+    target must be importable by name (a module-level function), since
+    workers are started with the "spawn" method.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[WorkerShard], None],
+        workers: int = config.SLACK_WORKERS,
+        drain_seconds: float = config.SHUTDOWN_DRAIN_SECONDS,
+    ):
+        self.target = target
+        self.drain_seconds = drain_seconds
+        # Spawned workers start clean instead of inheriting this process's threads and sockets
+        self._context = multiprocessing.get_context("spawn")
+        self.inboxes = [self._context.Queue() for _ in range(workers)]
+        self._workers = [_Worker() for _ in range(workers)]
+        self._stop = threading.Event()
+        self._metrics = {"restarts": 0}
+
+    def run(self) -> None:
+        """Start the workers and supervise them until a stop signal"""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: self._stop.set())
+        for index in range(len(self._workers)):
+            self._start(index)
+        logger.info(f"Supervisor started {len(self._workers)} workers")
+        while not self._stop.wait(0.5):
+            self._check_workers()
+        self._shutdown()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, int]:
+        alive = sum(1 for worker in self._workers if worker.process is not None and worker.process.is_alive())
+        return {"workers": len(self._workers), "alive": alive, **self._metrics}
+
+    def _start(self, index: int) -> None:
+        worker = self._workers[index]
+        shard = WorkerShard(index, len(self._workers), self.inboxes)
+        process = self._context.Process(target=self.target, args=(shard,), name=f"slack-worker-{index}")
+        process.start()
+        worker.process = process
+        worker.started_at = time.monotonic()
+        logger.info(f"Started worker {index} (pid {process.pid})")
+
+    def _check_workers(self) -> None:
+        now = time.monotonic()
+        for index, worker in enumerate(self._workers):
+            process = worker.process
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                # Just exited: schedule the restart, backing off if it keeps crashing
+                ran_for = now - worker.started_at
+                worker.failures = 0 if ran_for >= STABLE_RUN_SECONDS else worker.failures + 1
+                delay = min(MAX_RESTART_DELAY, 2.0 ** worker.failures - 1) if worker.failures else 0.0
+                logger.warning(
+                    f"Worker {index} (pid {process.pid}) exited with code {process.exitcode} "
+                    f"after {ran_for:.0f}s, restarting in {delay:.0f}s"
+                )
+                worker.process = None
+                worker.restart_at = now + delay
+            if now >= worker.restart_at:
+                self._metrics["restarts"] += 1
+                self._start(index)
+
+    def _shutdown(self) -> None:
+        """Ask every worker to drain and stop, killing those that don't exit in time"""
+        logger.info(f"Stopping {len(self._workers)} workers (drain up to {self.drain_seconds:.0f}s)")
+        processes = [worker.process for worker in self._workers if worker.process is not None]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.drain_seconds + 10
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker pid {process.pid} did not stop in time, killing it")
+                process.kill()
+                process.join()
+        logger.info("All workers stopped")
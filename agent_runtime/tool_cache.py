@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Result cache for agent tools
+A decorator that memoizes a tool's result per arguments, either for a TTL
+or until the current wall-clock time bucket ends (e.g. per minute)
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from agent_runtime import config
+from agent_runtime.metrics import TOOL_CACHE
+
+
+def cache_key(args: tuple, kwargs: Dict[str, Any]) -> Hashable:
+    """Stable key for call arguments (JSON for dicts/lists, repr for the rest)"""
+    return json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=repr)
+
+
+class ToolResultCache:
+    """LRU of results whose validity ends at an expiry time or a time-bucket change"""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: Optional[float] = None,
+        granularity: Optional[float] = None,
+        max_entries: int = config.TOOL_CACHE_MAX_ENTRIES,
+    ):
+        if (ttl_seconds is None) == (granularity is None):
+            raise ValueError("Pass exactly one of ttl_seconds or granularity")
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.granularity = granularity
+        self.max_entries = max_entries
+        # key -> (validity marker, result)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0}
+
+    def _current_bucket(self) -> float:
+        # Aligned to the wall clock, so "per minute" changes exactly when the minute does
+        return time.time() // self.granularity
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """(True, result) if a valid entry exists, else (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                marker, result = entry
+                valid = (marker == self._current_bucket() if self.granularity
+                         else marker > time.monotonic())
+                if valid:
+                    self._entries.move_to_end(key)
+                    self._metrics["hits"] += 1
+                    TOOL_CACHE.inc(tool=self.name, result="hit")
+                    return True, result
+                del self._entries[key]
+            self._metrics["misses"] += 1
+        TOOL_CACHE.inc(tool=self.name, result="miss")
+        return False, None
+
+    def put(self, key: Hashable, result: Any) -> None:
+        marker = self._current_bucket() if self.granularity else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (marker, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), **self._metrics}
+
+
+# name -> cache of every function decorated with cached_tool
+tool_caches: Dict[str, ToolResultCache] = {}
+
+
+def cached_tool(
+    ttl_seconds: Optional[float] = None,
+    granularity: Optional[float] = None,
+    name: Optional[str] = None,
+    max_entries: int = config.TOOL_CACHE_MAX_ENTRIES,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Cache a function's results per arguments
+
+    granularity caches until the wall-clock bucket of that many seconds ends
+    (60 = per minute); ttl_seconds caches for a fixed time. Apply it under
+    @tool so the tool schema still comes from the original signature.
+    Returned results are shared, so callers must not mutate them.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        cache = tool_caches[name or fn.__name__] = ToolResultCache(
+            name or fn.__name__, ttl_seconds, granularity, max_entries
+        )
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not config.TOOL_CACHE_ENABLED:
+                return fn(*args, **kwargs)
+            key = cache_key(args, kwargs)
+            found, result = cache.get(key)
+            if found:
+                return result
+            result = fn(*args, **kwargs)
+            cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def tool_cache_stats() -> Dict[str, int]:
+    """Stats of all tool caches, flattened as "<tool>_<stat>" """
+    return {
+        f"{name}_{stat}": value
+        for name, cache in tool_caches.items()
+        for stat, value in cache.stats().items()
+    }
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Concurrent tool execution for the agent's tool node
+Runs the tool calls of one model turn in parallel with per-tool timeouts
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from agent_runtime import config
+from agent_runtime.metrics import TOOL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.TOOL_MAX_WORKERS,
+                    thread_name_prefix="agent-tool",
+                )
+    return _executor
+
+
+def _timed_invoke(tool, args: Dict[str, Any]):
+    """Invoke a tool, returning (result, error, seconds)"""
+    start = time.perf_counter()
+    try:
+        return tool.invoke(args), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+
+def execute_tool_calls(
+    tool_calls: Sequence[Mapping[str, Any]],
+    tools_by_name: Mapping[str, Any],
+    timeout: float = config.TOOL_TIMEOUT_SECONDS,
+) -> List[Any]:
+    """Run tool calls concurrently and return their ToolMessages in call order
+
+    Failures and timeouts are returned as error ToolMessages so the model can
+    still answer. A timed-out tool keeps running in its worker thread (Python
+    threads cannot be cancelled), but the agent no longer waits for it.
+    """
+    from langchain_core.messages import ToolMessage
+
+    submitted = time.perf_counter()
+    futures: List[Optional[Future]] = []
+    for tool_call in tool_calls:
+        tool = tools_by_name.get(tool_call["name"])
+        futures.append(_get_executor().submit(_timed_invoke, tool, tool_call["args"]) if tool else None)
+
+    outputs = []
+    for tool_call, future in zip(tool_calls, futures):
+        name = tool_call["name"]
+        status = "ok"
+        if future is None:
+            content, status = f"Error: unknown tool {name}", "error"
+            seconds = 0.0
+        else:
+            try:
+                remaining = max(0.0, submitted + timeout - time.perf_counter())
+                result, error, seconds = future.result(timeout=remaining)
+                if error is None:
+                    content = str(result)
+                else:
+                    content, status = f"Error: tool {name} failed: {error}", "error"
+            except FutureTimeoutError:
+                seconds = time.perf_counter() - submitted
+                content, status = f"Error: tool {name} timed out after {timeout:g}s", "timeout"
+        TOOL_SECONDS.observe(seconds, tool=name, status=status)
+        if status != "ok":
+            logger.warning(content)
+        outputs.append(
+            ToolMessage(
+                content=content,
+                name=name,
+                tool_call_id=tool_call["id"],
+                status="success" if status == "ok" else "error",
+            )
+        )
+    return outputs
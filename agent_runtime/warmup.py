@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Warm-up of the suggested prompts
+Precomputes answers at startup and refreshes them periodically in the background
+"""
+
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from agent_runtime import config
+from agent_runtime.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class PromptWarmer:
+    """Keeps pinned cache entries with fresh answers for a list of questions
+
+    answer(question) returns the answer to pin, or None when there is none
+    worth caching this time (model down, answer depends on tools...); the
+    question is then left as it is and tried again on the next refresh.
+    """
+
+    def __init__(
+        self,
+        answer: Callable[[str], Optional[str]],
+        cache: ResponseCache,
+        questions: List[str],
+        interval_seconds: float = config.PROMPT_WARMUP_INTERVAL_SECONDS,
+    ):
+        self.answer = answer
+        self.cache = cache
+        self.questions = questions
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def warm_once(self) -> int:
+        """Compute and cache an answer for every question; returns how many succeeded"""
+        warmed = 0
+        for question in self.questions:
+            if self._stop.is_set():
+                break
+            try:
+                answer = self.answer(question)
+            except Exception as e:
+                logger.warning(f"Warm-up failed for {question!r}: {e}")
+                continue
+            if answer:
+                self.cache.put(question, answer, pinned=True)
+                warmed += 1
+            else:
+                logger.info(f"No cacheable answer for {question!r}, retrying on the next refresh")
+        logger.info(f"Warmed up {warmed}/{len(self.questions)} suggested prompts")
+        return warmed
+
+    def start(self) -> None:
+        """Warm up in a background thread and refresh every interval_seconds"""
+        self._thread = threading.Thread(target=self._run, name="prompt-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop refreshing (an in-flight answer is allowed to finish)"""
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.warm_once()
+            self._stop.wait(self.interval_seconds)
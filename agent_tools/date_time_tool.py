@@ -7,7 +7,10 @@ from datetime import datetime
 from typing import Dict
 from langchain_core.tools import tool
 
+from agent_runtime.tool_cache import cached_tool
+
 @tool
+@cached_tool(granularity=60)
 def get_current_datetime() -> Dict[str, str]:
     """
     Gets the current date and time in a readable format.
@@ -38,6 +41,7 @@ def get_current_datetime() -> Dict[str, str]:
         }
 
 @tool
+@cached_tool(granularity=60)
 def get_date_info() -> str:
     """
     Gets current date information in a readable format for the user.
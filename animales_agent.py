@@ -2,49 +2,41 @@
 """
 Animales Agent with LangGraph
 Specialized agent for answering questions about animals
+
+The LLM, tools and compiled graph are built lazily on first use (see
+get_animales_agent), so importing this module stays cheap and does not
+require GEMINI_API_KEY until the agent actually runs. Other domain agents
+can be registered in agent_registry and share this process, its models and
+the graph structure.
 """
 
+import importlib
+import logging
 import os
-from typing import Annotated, Sequence, TypedDict
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, TypedDict, Union
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import StateGraph, END
-from langgraph.graph.message import add_messages
-from langchain_core.runnables import RunnableConfig
-
-# Import only the datetime tool
-from agent_tools.date_time_tool import get_current_datetime
-
-# Define the state structure
-class AgentState(TypedDict):
-    """The state of the agent."""
-    messages: Annotated[Sequence[BaseMessage], add_messages]
-    number_of_steps: int
-
-# Initialize the LLM
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("Please set GEMINI_API_KEY environment variable")
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash-lite-001",
-    temperature=0.7,
-    max_retries=2,
-    google_api_key=api_key,
+from agent_runtime import config as runtime_config
+from agent_runtime.budget import RunBudget
+from agent_runtime.history import compact, rehydrate, tool_notes
+from agent_runtime.logging_setup import redact
+from agent_runtime.metrics import (
+    DEGRADED_RESPONSES, PREFILTER_DECISIONS, RUN_BUDGET_EXCEEDED, RUN_LLM_STEPS, llm_usage, record_llm_usage, trace_span,
 )
+from agent_runtime.prefilter import TopicPrefilter, classify_complexity, detect_language, model_for
+from agent_runtime.registry import AgentRegistry, AgentSpec
+from agent_runtime.resilience import LLMUnavailableError, ResilientLLM, remaining
+from agent_runtime.response_cache import ResponseCache
+from agent_runtime.tool_cache import cached_tool
 
-# Define our tools (only datetime)
-tools = [
-    get_current_datetime
-]
-
-# Bind tools to the model
-model = llm.bind_tools(tools)
+logger = logging.getLogger(__name__)
 
 # Define the system prompt for the animals agent
 SYSTEM_PROMPT = """You are a specialized Animals Expert Agent that answers questions about animals.
@@ -83,154 +75,700 @@ IMPORTANT INSTRUCTIONS:
 - Respond in the same language as the user's question
 - Keep responses informative but concise"""
 
-# Create tools dictionary for easy access
-tools_by_name = {tool.name: tool for tool in tools}
+# Canned redirect for off-topic questions, as in the system prompt
+OFF_TOPIC_REDIRECTS = {
+    "en": "I'm an animal expert! I'd be happy to answer questions about animals, wildlife, pets, or related topics. What would you like to know about animals?",
+    "es": "¡Soy un experto en animales! Con gusto respondo preguntas sobre animales, fauna silvestre, mascotas o temas relacionados. ¿Qué te gustaría saber sobre los animales?",
+}
+
+# Canned answer when no model can answer in time (upstream outage or brownout)
+DEGRADED_MESSAGES = {
+    "en": "🐾 I'm having trouble reaching my animal knowledge right now. Please try again in a few minutes.",
+    "es": "🐾 Ahora mismo tengo problemas para consultar mi conocimiento sobre animales. Por favor, intenta de nuevo en unos minutos.",
+}
+
+# Answer of a run stopped by its budget when the model had only asked for more tools
+BUDGET_MESSAGES = {
+    "en": "🐾 This question needed more steps than I can take in one answer. Could you make it a bit more specific?",
+    "es": "🐾 Esta pregunta necesitaba más pasos de los que puedo dar en una sola respuesta. ¿Puedes hacerla un poco más concreta?",
+}
+
+# Artifact of the tool results stop_at_budget adds for the calls it didn't run
+BUDGET_SKIPPED = "skipped_by_budget"
+
+# Words (normalized, singular) that keep a question on topic for the local pre-filter
+ANIMAL_WORDS = frozenset("""
+    animal fauna mascota pet especie species wildlife habitat zoo veterinario vet raza breed
+    mamifero mammal ave bird pajaro pez fish reptil reptile anfibio amphibian insecto insect
+    perro dog cachorro puppy gato cat gatito kitten caballo horse vaca cow cerdo pig oveja sheep
+    cabra goat gallina chicken pollo pato duck conejo rabbit raton mouse rata rat hamster
+    leon lion tigre tiger oso bear lobo wolf zorro fox elefante elephant jirafa giraffe cebra zebra
+    mono monkey gorila gorilla chimpance chimpanzee ballena whale delfin dolphin tiburon shark
+    pulpo octopus tortuga turtle tortoise serpiente snake piton python cocodrilo crocodile
+    aguila eagle buho owl loro parrot pinguino penguin abeja bee hormiga ant mariposa butterfly
+    arana spider murcielago bat canguro kangaroo koala panda camello camel rinoceronte rhino
+    hipopotamo hippo jaguar leopardo leopard guepardo cheetah foca seal nutria otter ardilla squirrel
+""".split())
+
+# Words that mark a question as clearly about something else
+OFF_TOPIC_WORDS = frozenset("""
+    programar programming programacion javascript codigo code sql excel bitcoin cripto crypto
+    blockchain politica politics elecciones election presidente president impuestos taxes
+    hipoteca mortgage futbol football soccer pelicula movie netflix cancion song receta recipe
+    matematicas math ecuacion equation
+""".split())
+
+# Prompt used to fold old turns into the running conversation summary
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an animals expert assistant.
+
+Update the existing summary with the new messages. Keep the animals and topics discussed, key facts
+already given and anything the user said about themselves or their pets. Write it in the same language
+as the conversation, in at most 150 words. Return only the updated summary."""
+
+def create_response_cache():
+    """Create the first-turn response cache (None if disabled)"""
+    if not runtime_config.RESPONSE_CACHE_ENABLED:
+        return None
+    embed = None
+    if runtime_config.RESPONSE_CACHE_SEMANTIC:
+        @lru_cache(maxsize=1)
+        def get_embeddings():
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            return GoogleGenerativeAIEmbeddings(
+                model=runtime_config.RESPONSE_CACHE_EMBEDDING_MODEL,
+                google_api_key=os.getenv("GEMINI_API_KEY"),
+            )
+
+        def embed(text):
+            return get_embeddings().embed_query(text)
+    return ResponseCache(embed=embed)
+
+# Answers to repeated first-turn questions (e.g. the suggested prompts)
+response_cache = create_response_cache()
+
+# Chat model used by agents that don't name one
+DEFAULT_MODEL = "gemini-2.0-flash-lite-001"
+
+# Guards the lazy construction of the LLMs
+_build_lock = threading.RLock()
+# model name -> chat model, shared by every agent using that model
+_llms: Dict[str, Any] = {}
+_llm_override = None
+
+def _create_llm(model: str = DEFAULT_MODEL):
+    """Create a Gemini chat model"""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("Please set GEMINI_API_KEY environment variable")
+
+    return ChatGoogleGenerativeAI(
+        model=model,
+        temperature=0.7,
+        timeout=runtime_config.LLM_TIMEOUT_SECONDS,
+        max_retries=runtime_config.LLM_MAX_RETRIES,
+        google_api_key=api_key,
+    )
+
+def get_llm(model: Optional[str] = None):
+    """Get the shared LLM for a model name (created on first use)"""
+    if _llm_override is not None:
+        return _llm_override
+    model = model or DEFAULT_MODEL
+    llm = _llms.get(model)
+    if llm is None:
+        with _build_lock:
+            llm = _llms.get(model)
+            if llm is None:
+                llm = _llms[model] = _create_llm(model)
+    return llm
+
+def check_llm_config():
+    """Fail at startup, not on the first message, when the agents' model can't be created"""
+    if _llm_override is None and not os.getenv("GEMINI_API_KEY"):
+        raise ValueError("GEMINI_API_KEY environment variable is required")
+
+# Deadlines, circuit breakers and the fallback model for the agents' LLM calls
+llm_guard = ResilientLLM()
+
+def set_llm(llm):
+    """Replace the LLM used by every agent (e.g. a fake chat model for benchmarks)"""
+    global _llm_override
+    with _build_lock:
+        _llm_override = llm
+        get_model.cache_clear()
+        agent_registry.clear()
+
+@lru_cache(maxsize=1)
+def get_tools():
+    """Get the agent tools (only datetime)"""
+    from agent_tools.date_time_tool import get_current_datetime
+    return [
+        get_current_datetime
+    ]
+
+@lru_cache(maxsize=1)
+def get_tools_by_name():
+    """Tools dictionary for easy access"""
+    return {tool.name: tool for tool in get_tools()}
+
+# The animals agent, the default one
+ANIMALES_AGENT = AgentSpec(
+    name="animales",
+    system_prompt=SYSTEM_PROMPT,
+    load_tools=get_tools,
+    description="Animals expert",
+    keywords=("animal", "animales", "animals", "mascota", "mascotas", "pet", "pets", "especie", "species"),
+    prefilter=TopicPrefilter(ANIMAL_WORDS, OFF_TOPIC_WORDS, OFF_TOPIC_REDIRECTS),
+)
+
+@lru_cache(maxsize=None)
+def get_model(spec: AgentSpec = ANIMALES_AGENT, model: Optional[str] = None):
+    """Get an agent's LLM (or the given model) with its tools bound"""
+    return get_llm(model or spec.model).bind_tools(spec.load_tools())
 
 # Define our tool node
-def call_tool(state: AgentState):
-    """Execute the tool calls from the last message"""
-    outputs = []
-    # Iterate over the tool calls in the last message
-    for tool_call in state["messages"][-1].tool_calls:
-        # Get the tool by name
-        tool_result = tools_by_name[tool_call["name"]].invoke(tool_call["args"])
-        outputs.append(
-            ToolMessage(
-                content=str(tool_result),
-                name=tool_call["name"],
-                tool_call_id=tool_call["id"],
-            )
+def call_tool(
+    state: Dict[str, Any],
+    tools_by_name: Optional[Dict[str, Any]] = None,
+    deadline: Optional[float] = None,
+):
+    """Execute the tool calls from the last message (concurrently, results in call order)"""
+    from agent_runtime.tool_executor import execute_tool_calls
+
+    timeout = max(0.0, remaining(deadline, runtime_config.TOOL_TIMEOUT_SECONDS))
+    with trace_span("tools"):
+        outputs = execute_tool_calls(
+            state["messages"][-1].tool_calls, tools_by_name or get_tools_by_name(), timeout=timeout
         )
     return {"messages": outputs}
 
-def call_model(
-    state: AgentState,
-    config: RunnableConfig,
-):
-    """Call the LLM with the current state"""
+def summarize_conversation(previous_summary: str, messages: Sequence[Any], deadline: Optional[float] = None) -> str:
+    """Fold older messages into the running summary (only the new messages are sent)
+
+    The call goes through llm_guard like the agent's own, so it respects the
+    run's deadline, the circuit breaker and the fallback model.
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    # By type, so compacted history entries are summarized like messages
+    transcript = "\n".join(
+        f"{'User' if message.type == 'human' else 'Assistant'}: {message.content}"
+        for message in messages
+        if message.type in ("human", "ai") and message.content
+    )
+    prompt = [
+        SystemMessage(content=SUMMARY_PROMPT),
+        HumanMessage(content=f"EXISTING SUMMARY:\n{previous_summary or '(none)'}\n\nNEW MESSAGES:\n{transcript}"),
+    ]
+    with trace_span("summarize"):
+        response = llm_guard.call(lambda name: get_llm(name).invoke(prompt), DEFAULT_MODEL, deadline)
+    record_llm_usage(response)
+    return response.content
+
+@lru_cache(maxsize=None)
+def static_system_message(spec: AgentSpec):
+    """An agent's system prompt as a message, built once and reused as the cacheable prefix"""
+    from langchain_core.messages import SystemMessage
+    return SystemMessage(content=spec.system_prompt)
+
+@cached_tool(granularity=60)
+def current_datetime_context() -> str:
+    """Date/time context for the system prompt (rebuilt once per minute)"""
+    try:
+        from datetime import datetime
+        now = datetime.now()
+        return f"\n\nCURRENT DATE AND TIME: Today is {now.strftime('%A, %B %d, %Y')} at {now.strftime('%H:%M')} ({now.strftime('%Y-%m-%d %H:%M:%S')})."
+    except Exception as e:
+        return f"\n\nCURRENT DATE AND TIME: Unable to get current time - {str(e)}"
+
+def call_model(state: Dict[str, Any], config, spec: AgentSpec = ANIMALES_AGENT):
+    """Call the agent's LLM with the current state"""
+    from langchain_core.messages import SystemMessage
+
+    history = state.get("history") or []
+    
     # Get current date/time information for the first message
     additional_context = ""
-    if len(state["messages"]) == 1:  # First user message
-        try:
-            from datetime import datetime
-            now = datetime.now()
-            datetime_info = f"\n\nCURRENT DATE AND TIME: Today is {now.strftime('%A, %B %d, %Y')} at {now.strftime('%H:%M')} ({now.strftime('%Y-%m-%d %H:%M:%S')})."
-        except Exception as e:
-            datetime_info = f"\n\nCURRENT DATE AND TIME: Unable to get current time - {str(e)}"
-        
-        additional_context = datetime_info
+    if not history and len(state["messages"]) == 1 and not state.get("summary"):  # First user message
+        additional_context = current_datetime_context()
+    
+    # Earlier turns that no longer fit in the context window
+    if state.get("summary"):
+        additional_context += f"\n\nCONVERSATION SUMMARY (earlier messages): {state['summary']}"
+    
+    # Tool results behind earlier answers (the compacted history keeps only a short note of them)
+    notes = tool_notes(history)
+    if notes:
+        additional_context += "\n\nTOOL RESULTS FROM EARLIER TURNS: " + " | ".join(notes)
     
-    # Create enhanced system prompt with additional context if it's the first message
-    enhanced_prompt = SYSTEM_PROMPT + additional_context
-    messages = [SystemMessage(content=enhanced_prompt)] + state["messages"]
+    # The static prompt always comes first, byte-identical on every call, so the provider can
+    # serve it from its prompt prefix cache; per-call context follows it as a second system part
+    messages = [static_system_message(spec)]
+    if additional_context:
+        messages.append(SystemMessage(content=additional_context.strip()))
+    messages += rehydrate(history)
+    messages += state["messages"]
     
-    # Log only the current question and context count
-    current_question = state["messages"][-1].content if state["messages"] else "No question"
-    context_count = len(state["messages"])
-    print(f"🐾 Animal Question: {current_question}")
-    print(f"📊 Context messages: {context_count}")
+    # Log only the current question (redacted) and context count
+    logger.debug("llm_call question=%s context_messages=%d",
+                 redact(state["messages"][-1].content), len(history) + len(state["messages"]))
     
-    # Invoke the model with the messages including system prompt
-    response = model.invoke(messages, config)
-    # We return a list, because this will get added to the existing messages state using the add_messages reducer
+    # Invoke the model (the run's tier, if set) with the messages including system prompt,
+    # within the run's deadline and falling back to the secondary model if it fails
+    configurable = (config or {}).get("configurable", {})
+    model = configurable.get("model") or spec.model or DEFAULT_MODEL
+    stream_attempt = configurable.get("stream_attempt")
+    
+    def invoke(name):
+        # Each attempt is tagged; once the fallback starts, it is the only one whose tokens are
+        # streamed, even if the timed-out primary call is still generating in the background
+        attempt = uuid.uuid4().hex
+        if stream_attempt is not None:
+            stream_attempt["current"] = attempt
+        metadata = {**(config or {}).get("metadata", {}), "llm_attempt": attempt}
+        return get_model(spec, name).invoke(messages, {**(config or {}), "metadata": metadata})
+    
+    with trace_span("llm"):
+        response = llm_guard.call(invoke, model, configurable.get("deadline"))
+    record_llm_usage(response)
+    # We return a list, because this will get added to this run's messages using the add_messages reducer
     return {"messages": [response]}
 
 # Define the conditional edge that determines whether to continue or not
-def should_continue(state: AgentState):
-    """Determine if we should continue or end"""
+def should_continue(state: Dict[str, Any], config=None):
+    """Determine if we should continue, stop at the run's budget or end"""
     messages = state["messages"]
     # If the last message is not a tool call, then we finish
     if not messages[-1].tool_calls:
         return "end"
+    # Another llm/tools round must fit in the run's budget
+    configurable = (config or {}).get("configurable", {})
+    budget = configurable.get("budget")
+    if budget is not None and budget.exceeded(messages, configurable.get("started_at")):
+        return "budget"
     # default to continue
     return "continue"
 
-# Create the workflow graph
-workflow = StateGraph(AgentState)
-
-# 1. Add our nodes 
-workflow.add_node("llm", call_model)
-workflow.add_node("tools", call_tool)
-
-# 2. Set the entrypoint as `llm`, this is the first node called
-workflow.set_entry_point("llm")
-
-# 3. Add a conditional edge after the `llm` node is called.
-workflow.add_conditional_edges(
-    # Edge is used after the `llm` node is called.
-    "llm",
-    # The function that will determine which node is called next.
-    should_continue,
-    # Mapping for where to go next, keys are strings from the function return, and the values are other nodes.
-    # END is a special node marking that the graph is finish.
-    {
-        # If `continue`, then we call the tool node.
-        "continue": "tools",
-        # Otherwise we finish.
-        "end": END,
-    },
-)
-
-# 4. Add a normal edge after `tools` is called, `llm` node is called next.
-workflow.add_edge("tools", "llm")
+def stop_at_budget(state: Dict[str, Any], config=None):
+    """End a run over its budget: skip the pending tool calls and answer with what we have"""
+    from langchain_core.messages import AIMessage, ToolMessage
 
-# Now we can compile our graph
-graph = workflow.compile()
+    configurable = (config or {}).get("configurable", {})
+    budget = configurable.get("budget") or RunBudget()
+    messages = state["messages"]
+    reason = budget.exceeded(messages, configurable.get("started_at")) or "llm_steps"
+    RUN_BUDGET_EXCEEDED.inc(reason=reason)
+    logger.warning(f"Agent run over budget ({reason}), stopping before {len(messages[-1].tool_calls)} tool calls")
+    
+    # Every tool call gets its result, so the messages stay valid for the model
+    skipped = [
+        ToolMessage(content=f"Not run: the answer's {reason} budget was used up.",
+                    name=tool_call["name"], tool_call_id=tool_call["id"], artifact=BUDGET_SKIPPED)
+        for tool_call in messages[-1].tool_calls
+    ]
+    # The text the model wrote along with its tool calls, if any, else a canned reply
+    answer = _message_text(messages[-1])
+    if not answer:
+        question = next((message for message in messages if message.type == "human"), None)
+        answer = BUDGET_MESSAGES[detect_language(_message_text(question) or "")]
+    return {"messages": [*skipped, AIMessage(content=answer)]}
+
+def create_agent_state():
+    """Define the state structure (needs LangGraph, so it is built lazily too)"""
+    from langchain_core.messages import BaseMessage
+    from langgraph.graph.message import add_messages
+
+    class AgentState(TypedDict):
+        """The state of the agent."""
+        # Earlier turns as compacted entries, read-only during a run (only the context window replaces them)
+        history: Sequence[BaseMessage]
+        # This run's messages: the question, then model replies and tool results
+        messages: Annotated[Sequence[BaseMessage], add_messages]
+        summary: str
+
+    return AgentState
+
+def build_graph(spec: AgentSpec = ANIMALES_AGENT):
+    """Build and compile the graph of an agent"""
+    from langgraph.graph import StateGraph, END
+    from agent_runtime.context_window import ContextWindowManager
+
+    # Keeps the last turns verbatim and summarizes the rest before each run
+    manage_context = ContextWindowManager(summarize_conversation)
+    tools_by_name = {tool.name: tool for tool in spec.load_tools()}
+
+    # The nodes are the shared ones, bound to this agent's prompt, model and tools
+    def call_agent_model(state: Dict[str, Any], config):
+        return call_model(state, config, spec)
+
+    def call_agent_tool(state: Dict[str, Any], config):
+        return call_tool(state, tools_by_name, (config or {}).get("configurable", {}).get("deadline"))
+
+    # Create the workflow graph
+    workflow = StateGraph(create_agent_state())
+
+    # 1. Add our nodes 
+    workflow.add_node("context", manage_context)
+    workflow.add_node("llm", call_agent_model)
+    workflow.add_node("tools", call_agent_tool)
+    workflow.add_node("budget", stop_at_budget)
+
+    # 2. Set the entrypoint as `context`, it trims the history once per run before calling `llm`
+    workflow.set_entry_point("context")
+    workflow.add_edge("context", "llm")
+
+    # 3. Add a conditional edge after the `llm` node is called.
+    workflow.add_conditional_edges(
+        # Edge is used after the `llm` node is called.
+        "llm",
+        # The function that will determine which node is called next.
+        should_continue,
+        # Mapping for where to go next, keys are strings from the function return, and the values are other nodes.
+        # END is a special node marking that the graph is finish.
+        {
+            # If `continue`, then we call the tool node.
+            "continue": "tools",
+            # If the run is over its budget, we answer without calling the tools.
+            "budget": "budget",
+            # Otherwise we finish.
+            "end": END,
+        },
+    )
+
+    # 4. Add a normal edge after `tools` is called, `llm` node is called next.
+    workflow.add_edge("tools", "llm")
+    workflow.add_edge("budget", END)
+
+    # Now we can compile our graph
+    return workflow.compile()
+
+# Compiled graphs of every registered agent, built once and shared by all threads
+agent_registry = AgentRegistry(build_graph)
+agent_registry.register(ANIMALES_AGENT)
+
+def load_agent_modules(modules: str = runtime_config.AGENT_MODULES):
+    """Import extra agent modules (comma separated), which register their AgentSpec"""
+    for module in filter(None, (name.strip() for name in modules.split(","))):
+        importlib.import_module(module)
 
 def get_animales_agent():
-    """Get the compiled animales agent graph"""
-    return graph
-
-def run_agent(user_input: str, previous_state=None):
-    """Run the agent with a user input and maintain context"""
-    print(f"\n🐾 User: {user_input}")
-    print("=" * 50)
+    """Get the compiled animales agent graph (built once, on first use)"""
+    return agent_registry.graph(ANIMALES_AGENT.name)
+
+def run_agent(
+    user_input: str,
+    previous_state=None,
+    on_token: Optional[Callable[[str], None]] = None,
+    use_cache: bool = True,
+    agent: Optional[str] = None,
+    deadline: Optional[float] = None,
+    budget: Optional[RunBudget] = None,
+) -> Optional["AgentRunResult"]:
+    """Run an agent with a user input and maintain context
+
+    Returns an AgentRunResult (its state is the previous_state of the next
+    turn, whose message list it extends in place), or None on error.
+
+    If on_token is given, the text tokens generated by the LLM node are passed
+    to it as they arrive (used to stream replies to Slack). use_cache=False
+    skips the response cache entirely (used by the warm-up job). agent names
+    a registered agent, the default one if None. deadline (a time.monotonic()
+    timestamp) bounds the LLM and tool calls; past it, or when no model is
+    available, a degraded answer is returned instead. budget limits the
+    run's LLM steps, tool calls, time and tokens (RunBudget() from the
+    config if None); a run over it answers without calling more tools.
+    """
+    with trace_span("agent_run", agent=agent or agent_registry.default):
+        return _run_agent(user_input, previous_state, on_token, use_cache, agent, deadline, budget)
+
+class AgentRunResult(NamedTuple):
+    """Outcome of one run_agent call"""
+
+    # Final answer text, None if the model gave no text answer
+    answer: Optional[str]
+    # Conversation state to pass back as previous_state on the next turn
+    state: Dict[str, Any]
+    # Messages added by this run: the question, model replies and tool results
+    new_messages: List[Any]
+    # Individual tool calls run (calls skipped at the run's budget don't count)
+    tool_calls: int
+    # Tokens of this run's model calls: {"input", "output", "cached"}
+    usage: Dict[str, int]
+    # Where the answer came from: model, cache, prefilter or degraded
+    source: str = "model"
+
+def _message_text(message) -> Optional[str]:
+    content = getattr(message, "content", None)
+    return content if isinstance(content, str) and content.strip() else None
+
+def _budget_skipped(messages: Sequence[Any]) -> int:
+    """Tool calls stop_at_budget answered without running them"""
+    return sum(1 for message in messages if message.type == "tool" and message.artifact == BUDGET_SKIPPED)
+
+def _run_result(
+    previous_state,
+    new_messages: List[Any],
+    source: str = "model",
+    history: Optional[List[Any]] = None,
+    summary: Optional[str] = None,
+) -> AgentRunResult:
+    """Append a run's messages to the conversation log and wrap up the result
+
+    The message list is append-only: the new messages are added to the end of
+    the previous state's list (or of the trimmed history, when the context
+    window dropped older turns) instead of copying the whole conversation.
+    They are stored compacted (see agent_runtime.history); the result's
+    new_messages keeps the full messages.
+    """
+    previous_state = previous_state or {}
+    messages = history if history is not None else previous_state.get("messages")
+    if messages is None:
+        messages = []
+    messages.extend(compact(new_messages) if runtime_config.HISTORY_COMPACT_ENABLED else new_messages)
+    state = {
+        "messages": messages,
+        "summary": previous_state.get("summary", "") if summary is None else summary,
+    }
+
+    tool_calls = -_budget_skipped(new_messages)
+    usage = {"input": 0, "output": 0, "cached": 0}
+    for message in new_messages:
+        if message.type == "ai":
+            tool_calls += len(message.tool_calls)
+            input_tokens, output_tokens, cached_tokens = llm_usage(message)
+            usage["input"] += input_tokens
+            usage["output"] += output_tokens
+            usage["cached"] += cached_tokens
+    last = new_messages[-1] if new_messages else None
+    answer = _message_text(last) if last is not None and last.type == "ai" and not last.tool_calls else None
+    return AgentRunResult(answer, state, new_messages, tool_calls, usage, source)
+
+def _reply_result(previous_state, user_input: str, answer: str, source: str) -> AgentRunResult:
+    """Result for a question answered without running the graph"""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    return _run_result(previous_state, [HumanMessage(content=user_input), AIMessage(content=answer)], source)
+
+def _prepare_run(user_input, previous_state, agent, cache, model=None, deadline=None, budget=None):
+    """Answer a question locally (prefilter, cache) or build the inputs of a graph run
+
+    Returns an AgentRunResult when no graph run is needed, else (inputs, run_config).
+    """
+    from langchain_core.messages import HumanMessage
+
+    spec = agent_registry.spec(agent)
     
-    try:
-        # Create our initial message dictionary
+    # Clearly off-topic questions get the canned redirect without calling the model. Only the
+    # first message of a thread: follow-ups ("translate that", "what does the policy say about
+    # them?") refer to the thread's animals, which the keyword filter can't see
+    if spec.prefilter is not None and runtime_config.PREFILTER_ENABLED and previous_state is None:
+        redirect = spec.prefilter(user_input)
+        if redirect is not None:
+            PREFILTER_DECISIONS.inc(outcome="off_topic")
+            logger.debug("agent_run_prefiltered question=%s", redact(user_input))
+            return _reply_result(previous_state, user_input, redirect, "prefilter")
+    
+    # Serve repeated first-turn questions from the cache; follow-ups depend on the thread history
+    if cache is not None:
         if previous_state is None:
-            # First question - start fresh
-            inputs = {
-                "messages": [HumanMessage(content=user_input)],
-                "number_of_steps": 0
-            }
+            cached_answer = cache.get(user_input)
+            if cached_answer is not None:
+                logger.debug("agent_run_cached answer=%s", redact(cached_answer))
+                return _reply_result(None, user_input, cached_answer, "cache")
         else:
-            # Add to existing context
-            inputs = {
-                "messages": previous_state["messages"] + [HumanMessage(content=user_input)],
-                "number_of_steps": previous_state["number_of_steps"]
-            }
-        
-        tool_calls_count = 0
-        final_state = None
+            cache.record_bypass()
+    
+    # The earlier turns are passed as they are (no copy); the graph's message
+    # channel only holds this run's messages, starting with the question
+    previous_state = previous_state or {}
+    inputs = {
+        "history": previous_state.get("messages") or [],
+        "messages": [HumanMessage(content=user_input)],
+        "summary": previous_state.get("summary", "")
+    }
+    # Simple questions can go to a cheaper model and complex ones to a larger one
+    complexity = classify_complexity(user_input)
+    PREFILTER_DECISIONS.inc(outcome=complexity)
+    budget = budget or RunBudget()
+    run_config = {"configurable": {
+        "model": model or model_for(complexity),
+        "deadline": deadline,
+        "budget": budget,
+        "started_at": time.monotonic(),
+    }}
+    # The step budget normally ends the loop first; the recursion limit is the backstop
+    recursion_limit = budget.recursion_limit()
+    if recursion_limit:
+        run_config["recursion_limit"] = recursion_limit
+    return inputs, run_config
+
+def _finish_run(user_input, previous_state, new_messages, cache, history=None, summary=None):
+    """Result of a graph run; caches the answer when it can be reused"""
+    result = _run_result(previous_state, new_messages, "model", history, summary)
+    # Every AI message is a model call, except the answer of a run stopped at its budget
+    stopped = _budget_skipped(new_messages) > 0
+    RUN_LLM_STEPS.observe(sum(1 for message in new_messages if message.type == "ai") - stopped)
+    logger.debug("agent_run_finished tool_calls=%d", result.tool_calls)
+    
+    answer = cacheable_answer(result)
+    if cache is not None and not previous_state and answer:
+        cache.put(user_input, answer)
+    return result
+
+def cacheable_answer(result: Optional[AgentRunResult]) -> Optional[str]:
+    """A first-turn answer that can be served again for the same question, else None
+
+    Only answers of the model itself that don't depend on tools (e.g. the
+    current date) nor were cut short by the run's budget; never degraded,
+    cached or prefilter replies.
+    """
+    if result is None or result.source != "model" or result.tool_calls or _budget_skipped(result.new_messages):
+        return None
+    return result.answer
+
+def _degraded_result(user_input, previous_state, cache, error) -> AgentRunResult:
+    """Keep answering while the model is down: a cached answer if there is one, else a canned reply
+
+    The reply is not added to the conversation: the state is the previous one
+    unchanged, so later turns never resend (or imitate) the outage message.
+    """
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    logger.warning(f"LLM unavailable, answering in degraded mode: {error}")
+    cached_answer = cache.get(user_input) if cache is not None else None
+    DEGRADED_RESPONSES.inc(source="cache" if cached_answer is not None else "canned")
+    answer = cached_answer or DEGRADED_MESSAGES[detect_language(user_input)]
+    state = {"messages": [], "summary": "", **(previous_state or {})}
+    new_messages = [HumanMessage(content=user_input), AIMessage(content=answer)]
+    return AgentRunResult(answer, state, new_messages, 0, {"input": 0, "output": 0, "cached": 0}, "degraded")
+
+def _run_agent(user_input, previous_state, on_token, use_cache, agent=None, deadline=None, budget=None):
+    from langchain_core.messages import AIMessageChunk
+
+    logger.debug("agent_run_started question=%s follow_up=%s", redact(user_input), previous_state is not None)
+    
+    agent = agent or agent_registry.default
+    # The cache holds the default agent's answers (e.g. its suggested prompts)
+    cache = response_cache if use_cache and agent == agent_registry.default else None
+    try:
+        prepared = _prepare_run(user_input, previous_state, agent, cache, deadline=deadline, budget=budget)
+        if isinstance(prepared, AgentRunResult):
+            if on_token and prepared.answer:
+                on_token(prepared.answer)
+            return prepared
+        inputs, run_config = prepared
         
-        # Call our graph with streaming to see the steps
-        for state in graph.stream(inputs, stream_mode="values"):
-            last_message = state["messages"][-1]
-            if isinstance(last_message, AIMessage):
-                if last_message.content.strip():
-                    print(f"🐾 Assistant: {last_message.content}")
-            elif isinstance(last_message, ToolMessage):
-                tool_calls_count += 1
-                print(f"🔧 Tool Call #{tool_calls_count}: {last_message.name}")
-                print(f"   Result: {last_message.content[:100]}...")
-            final_state = state
+        new_messages = list(inputs["messages"])
+        history = summary = None
+        # The LLM call attempt whose tokens may be streamed (set by call_model)
+        stream_attempt = run_config["configurable"]["stream_attempt"] = {}
         
-        print(f"📊 Total tool calls: {tool_calls_count}")
-        print("=" * 50)
+        # Stream each node's update (the delta, not the whole state) and the LLM tokens if requested
+        stream_mode = ["updates", "messages"] if on_token else ["updates"]
+        for mode, chunk in agent_registry.graph(agent).stream(inputs, run_config, stream_mode=stream_mode):
+            if mode == "messages":
+                message, metadata = chunk
+                # Only forward tokens of the answering model's current attempt, not of the
+                # summarizer or of a call that timed out and was replaced by the fallback
+                if (metadata.get("langgraph_node") == "llm"
+                        and metadata.get("llm_attempt") == stream_attempt.get("current")
+                        and isinstance(message, AIMessageChunk)
+                        and isinstance(message.content, str)
+                        and message.content):
+                    on_token(message.content)
+                continue
+            
+            for update in chunk.values():
+                if not update:
+                    continue
+                if "history" in update:
+                    history = update["history"]
+                if "summary" in update:
+                    summary = update["summary"]
+                for message in update.get("messages", ()):
+                    if message.type == "tool":
+                        logger.debug("tool_result tool=%s result=%s", message.name, redact(message.content))
+                    new_messages.append(message)
         
-        return final_state
+        return _finish_run(user_input, previous_state, new_messages, cache, history, summary)
         
+    except LLMUnavailableError as e:
+        return _degraded_result(user_input, previous_state, cache, e)
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        print("=" * 50)
+        logger.error(f"Agent error: {e}")
         return None
 
+def answer_batch(
+    questions: Sequence[str],
+    agent: Optional[str] = None,
+    model: Optional[str] = None,
+    max_concurrency: int = runtime_config.BATCH_MAX_CONCURRENCY,
+) -> Iterator[Tuple[int, Union[AgentRunResult, Exception]]]:
+    """Answer independent questions concurrently, yielding (index, result) as each one completes
+
+    Each question is a new conversation. Off-topic questions are answered by
+    the prefilter right away; the rest run through graph.batch_as_completed,
+    at most max_concurrency at a time. The response cache is not used, so
+    every answer reflects the current prompt and model; model overrides the
+    per-question model choice. A failed question yields its exception
+    instead of a degraded answer. Model calls are still capped at
+    LLM_MAX_CONCURRENT_CALLS; questions beyond it wait for a free call slot,
+    which doesn't count towards their LLM timeout. The run budget applies to
+    each question, except its time limit: questions wait for a slot after
+    being prepared.
+    """
+    agent = agent or agent_registry.default
+    pending = []
+    for index, question in enumerate(questions):
+        try:
+            prepared = _prepare_run(question, None, agent, None, model=model)
+        except Exception as e:
+            yield index, e
+            continue
+        if isinstance(prepared, AgentRunResult):
+            yield index, prepared
+        else:
+            pending.append((index, question, prepared))
+    if not pending:
+        return
+    
+    graph = agent_registry.graph(agent)
+    inputs = [prepared[0] for _, _, prepared in pending]
+    configs = [
+        {**prepared[1], "max_concurrency": max_concurrency,
+         "configurable": {**prepared[1]["configurable"], "started_at": None}}
+        for _, _, prepared in pending
+    ]
+    for position, output in graph.batch_as_completed(inputs, configs, return_exceptions=True):
+        index, question, _ = pending[position]
+        if isinstance(output, Exception):
+            yield index, output
+        else:
+            yield index, _finish_run(question, None, output["messages"], None)
+
+def answer_question(question: str) -> Optional[AgentRunResult]:
+    """Answer a standalone question from scratch (no cache, no previous context)"""
+    return run_agent(question, use_cache=False)
+
+def warmup_answer(question: str) -> Optional[str]:
+    """Answer a suggested prompt for the warm-up job: None unless the answer can be cached"""
+    return cacheable_answer(answer_question(question))
+
+def print_answer(result: Optional[AgentRunResult]):
+    """Print the agent's answer (CLI modes)"""
+    if not result or not result.answer:
+        print("❌ No se pudo obtener una respuesta")
+        return
+    print(f"🐾 Assistant: {result.answer}")
+    print("=" * 50)
+
 def show_context():
     """Show the agent's context and configuration"""
     print("🔧 Animales Agent Configuration:")
     print("=" * 50)
-    print(f"🔧 Available Tools: {len(tools)}")
+    print(f"🔧 Available Tools: {len(get_tools())}")
     print("   - get_current_datetime")
     print()
     print("📋 System Prompt (first 200 chars):")
@@ -278,7 +816,10 @@ def interactive_mode():
                 continue
             
             # Run the agent with the question
-            current_state = run_agent(user_input, current_state)
+            result = run_agent(user_input, current_state)
+            print_answer(result)
+            if result and result.source != "degraded":
+                current_state = result.state
             
         except KeyboardInterrupt:
             print("\n\n👋 ¡Hasta luego! Gracias por usar el agente de animales.")
@@ -287,8 +828,41 @@ def interactive_mode():
             print(f"\n❌ Error: {str(e)}")
             print("🔄 Continuando...")
 
+def batch_mode(args):
+    """Answer a JSONL file of questions (python animales_agent.py --batch questions.jsonl)"""
+    from agent_runtime.batch import answer_file
+    from agent_runtime.logging_setup import configure_logging
+
+    configure_logging()
+    output = args.output or f"{os.path.splitext(args.batch)[0]}.answers.jsonl"
+    print(f"🧪 MODO BATCH - {args.batch} → {output} (concurrencia {args.max_concurrency})")
+    stats = answer_file(
+        args.batch,
+        output,
+        lambda questions: answer_batch(questions, args.agent, args.model, args.max_concurrency),
+        resume=not args.no_resume,
+    )
+    print(f"✅ {stats['answered']} respondidas, ❌ {stats['failed']} con error, "
+          f"⏭️  {stats['skipped']} ya respondidas ({stats['seconds']} s)")
+
 def main():
     """Main function to run the animales agent"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Animales Agent (interactive, demo or batch mode)")
+    parser.add_argument("--batch", metavar="QUESTIONS.jsonl", help="answer a JSONL file of questions and exit")
+    parser.add_argument("--output", help="results JSONL (default: <input>.answers.jsonl)")
+    parser.add_argument("--max-concurrency", type=int, default=runtime_config.BATCH_MAX_CONCURRENCY,
+                        help="questions answered at the same time")
+    parser.add_argument("--model", help="model for every question (default: per-question choice)")
+    parser.add_argument("--agent", help="registered agent to use (default: AGENT_DEFAULT)")
+    parser.add_argument("--no-resume", action="store_true", help="overwrite the output instead of resuming")
+    args = parser.parse_args()
+    if args.batch:
+        load_agent_modules()
+        batch_mode(args)
+        return
+    
     print("🚀 Animales Agent with LangGraph")
     print("🐾 Expert in animal knowledge and facts")
     print()
@@ -320,7 +894,11 @@ def main():
         # Maintain state between questions
         current_state = None
         for question in questions:
-            current_state = run_agent(question, current_state)
+            print(f"\n🐾 User: {question}")
+            result = run_agent(question, current_state)
+            print_answer(result)
+            if result and result.source != "degraded":
+                current_state = result.state
             print()
 
 if __name__ == "__main__":
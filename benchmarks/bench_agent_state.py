@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Agent state benchmark
+Compares the cost of one turn at several thread lengths between the old run
+loop (full history copied into the graph input, merged by the add_messages
+reducer on every step and materialized by stream_mode="values") and the
+current one (history passed as is, per-node deltas with stream_mode="updates").
+Uses the fake chat model with no latency and no context trimming, so only the
+agent's own per-turn work is measured.
+
+Usage:
+    python benchmarks/bench_agent_state.py
+    python benchmarks/bench_agent_state.py --lengths 10 200 1000 --iterations 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Keep the whole history in the window and skip the shortcuts that bypass the graph
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-placeholder")
+os.environ["CONTEXT_MAX_TURNS"] = "1000000"
+os.environ["CONTEXT_MAX_TOKENS"] = "1000000000"
+os.environ["PREFILTER_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from typing import Annotated, Sequence, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+
+import animales_agent
+from benchmarks.fakes import FakeChatModel
+
+QUESTION = "¿Cuánto vive una tortuga marina?"
+
+
+class LegacyState(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+    number_of_steps: int
+    summary: str
+
+
+def build_legacy_graph():
+    """The graph as it was: every message of the thread in the add_messages channel"""
+    workflow = StateGraph(LegacyState)
+    workflow.add_node("llm", animales_agent.call_model)
+    workflow.add_node("tools", animales_agent.call_tool)
+    workflow.set_entry_point("llm")
+    workflow.add_conditional_edges("llm", animales_agent.should_continue, {"continue": "tools", "end": END})
+    workflow.add_edge("tools", "llm")
+    return workflow.compile()
+
+
+def legacy_turn(graph, previous_state):
+    """The old run loop: copy the history into the input, stream full states"""
+    inputs = {
+        "messages": previous_state["messages"] + [HumanMessage(content=QUESTION)],
+        "number_of_steps": previous_state["number_of_steps"],
+        "summary": previous_state.get("summary", ""),
+    }
+    final_state = None
+    for state in graph.stream(inputs, {"configurable": {}}, stream_mode="values"):
+        final_state = state
+    return final_state
+
+
+def current_turn(previous_state):
+    return animales_agent.run_agent(QUESTION, previous_state, use_cache=False)
+
+
+def build_history(length: int):
+    """A thread with `length` messages alternating questions and answers"""
+    return [
+        HumanMessage(content=f"{QUESTION} (pregunta {index})") if index % 2 == 0
+        else AIMessage(content="Las tortugas marinas pueden vivir más de 50 años. " * 4)
+        for index in range(length)
+    ]
+
+
+def measure(turn, history, iterations):
+    elapsed = 0.0
+    for _ in range(iterations):
+        # The current loop appends to the state's list, so each turn gets a fresh one
+        state = {"messages": list(history), "number_of_steps": 0, "summary": ""}
+        start = time.perf_counter()
+        turn(state)
+        elapsed += time.perf_counter() - start
+    return elapsed / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn agent cost at various thread lengths")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 100, 500, 2000], help="messages in the thread")
+    parser.add_argument("--iterations", type=int, default=30, help="turns per measurement")
+    args = parser.parse_args()
+
+    animales_agent.set_llm(FakeChatModel(first_token_latency=0, token_latency=0, output_tokens=20))
+    legacy_graph = build_legacy_graph()
+    # Warm up both paths (graph compilation, imports)
+    legacy_turn(legacy_graph, {"messages": [], "number_of_steps": 0})
+    current_turn(None)
+
+    print("🧵 Agent cost per turn (fake model, no latency)")
+    print("=" * 60)
+    print(f"{'history':>8}  {'legacy (values)':>16}  {'current (updates)':>18}")
+    for length in args.lengths:
+        history = build_history(length)
+        legacy = measure(lambda state: legacy_turn(legacy_graph, state), history, args.iterations)
+        current = measure(current_turn, history, args.iterations)
+        print(f"{length:>8}  {legacy * 1e3:>13.2f} ms  {current * 1e3:>15.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Stored history benchmark
+Measures what each finished turn costs once kept in conversation_states:
+memory held (tracemalloc), bytes written by the SQLite store and tokens resent
+to the model on every later call, with full LangChain messages (Gemini
+metadata, tool calls and tool results) versus the compacted history.
+
+Usage:
+    python benchmarks/bench_history.py
+    python benchmarks/bench_history.py --turns 200 --tool-every 2
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent_runtime.context_window import estimate_tokens
+from agent_runtime.conversation_store import serialize_state
+from agent_runtime.history import compact, rehydrate, tool_notes
+from agent_tools.date_time_tool import get_current_datetime
+
+ANSWER = (
+    "Las tortugas marinas pueden vivir más de 50 años, y algunas especies superan los 80. "
+    "Pasan casi toda su vida en el océano y las hembras vuelven a la playa donde nacieron para desovar."
+)
+
+
+def response_metadata():
+    """Metadata similar to what langchain-google-genai attaches to each reply"""
+    return {
+        "prompt_feedback": {"block_reason": 0, "safety_ratings": []},
+        "finish_reason": "STOP",
+        "model_name": "gemini-2.0-flash-lite-001",
+        "safety_ratings": [
+            {"category": category, "probability": "NEGLIGIBLE", "blocked": False}
+            for category in ("HARM_CATEGORY_HATE_SPEECH", "HARM_CATEGORY_DANGEROUS_CONTENT",
+                             "HARM_CATEGORY_HARASSMENT", "HARM_CATEGORY_SEXUALLY_EXPLICIT")
+        ],
+    }
+
+
+def usage_metadata():
+    return {"input_tokens": 812, "output_tokens": 64, "total_tokens": 876,
+            "input_token_details": {"cache_read": 455}}
+
+
+def build_turn(index: int, with_tool: bool):
+    """The messages one turn adds to the state, as the agent produces them"""
+    messages = [HumanMessage(content=f"¿Cuánto vive una tortuga marina? (pregunta {index})", id=f"h-{index}")]
+    if with_tool:
+        call_id = f"call-{index}"
+        messages.append(AIMessage(
+            content="", id=f"run-{index}-0",
+            tool_calls=[{"name": "get_current_datetime", "args": {}, "id": call_id, "type": "tool_call"}],
+            response_metadata=response_metadata(), usage_metadata=usage_metadata(),
+        ))
+        messages.append(ToolMessage(
+            content=str(get_current_datetime.invoke({})), name="get_current_datetime",
+            tool_call_id=call_id, id=f"tool-{index}",
+        ))
+    messages.append(AIMessage(
+        content=ANSWER, id=f"run-{index}-1",
+        response_metadata=response_metadata(), usage_metadata=usage_metadata(),
+    ))
+    return messages
+
+
+def build_history(turns: int, tool_every: int, compacted: bool):
+    history = []
+    for index in range(turns):
+        turn = build_turn(index, tool_every > 0 and index % tool_every == 0)
+        history.extend(compact(turn) if compacted else turn)
+    return history
+
+
+def memory_bytes(turns: int, tool_every: int, compacted: bool) -> int:
+    """Bytes still allocated for the history once the turns are built (and compacted)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    history = build_history(turns, tool_every, compacted)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del history
+    return size
+
+
+def prompt_tokens(history) -> int:
+    """History tokens sent with every model call (plus the tool notes for compacted entries)"""
+    notes = tool_notes(history)
+    return estimate_tokens(rehydrate(history)) + sum(len(note) for note in notes) // 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stored bytes and resent tokens per turn, full vs compacted")
+    parser.add_argument("--turns", type=int, default=100, help="finished turns in the thread")
+    parser.add_argument("--tool-every", type=int, default=3, help="one turn in N calls a tool (0 = never)")
+    args = parser.parse_args()
+
+    print(f"🗜️  Stored history per turn ({args.turns} turns, a tool call every {args.tool_every})")
+    print("=" * 60)
+    print(f"{'':>10}  {'memory':>12}  {'stored (SQLite)':>16}  {'tokens/call':>12}")
+    results = {}
+    for label, compacted in (("full", False), ("compacted", True)):
+        history = build_history(args.turns, args.tool_every, compacted)
+        memory = memory_bytes(args.turns, args.tool_every, compacted) / args.turns
+        stored = len(serialize_state({"messages": history}).encode()) / args.turns
+        tokens = prompt_tokens(history) / args.turns
+        results[label] = (memory, stored, tokens)
+        print(f"{label:>10}  {memory:>9.0f} B  {stored:>13.0f} B  {tokens:>12.1f}")
+    full, compacted = results["full"], results["compacted"]
+    savings = [100 * (1 - after / before) for before, after in zip(full, compacted)]
+    print(f"{'saved':>10}  {savings[0]:>10.0f} %  {savings[1]:>14.0f} %  {savings[2]:>10.0f} %")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
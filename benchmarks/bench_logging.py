@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Logging overhead benchmark
+Compares, per handled message, the old logging of process_message (full
+history dump at INFO through a synchronous handler) with the current
+level-gated, redacted, queued logging, at several thread lengths.
+
+Usage:
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --lengths 10 100 500 --iterations 500
+"""
+
+import argparse
+import io
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent_runtime.logging_setup import Lazy, SamplingFilter, redact
+
+
+def build_history(length: int):
+    """A thread with `length` messages mixing questions, answers and tool results"""
+    messages = []
+    for index in range(length):
+        if index % 3 == 0:
+            messages.append(HumanMessage(content=f"¿Cuánto vive una tortuga marina? (pregunta {index})"))
+        elif index % 3 == 1:
+            messages.append(ToolMessage(content='{"date": "2026-10-18"}', name="get_current_datetime",
+                                        tool_call_id=f"call-{index}"))
+        else:
+            messages.append(AIMessage(content="Las tortugas marinas pueden vivir más de 50 años. " * 8))
+    return messages
+
+
+def legacy_logging(logger, event, user_message, messages, trace_summary):
+    """What process_message/handle_message logged per message before the overhaul"""
+    logger.info(f"Queueing message in thread {event['thread_ts']}: {user_message}")
+    logger.info(f"Channel ID: {event['channel']}")
+    logger.info(f"Processing message in thread {event['thread_ts']}: {user_message}")
+    logger.info(f"Calling run_agent with message: {user_message}")
+    logger.info(f"run_agent returned: {messages is not None}")
+    logger.info(f"Final state messages count: {len(messages)}")
+    for i, message in enumerate(reversed(messages)):
+        logger.info(f"Message {i}: type={type(message)}, content={getattr(message, 'content', 'NO_CONTENT')[:100] if hasattr(message, 'content') else 'NO_CONTENT'}")
+    logger.info(f"Request trace: {trace_summary()}")
+
+
+def current_logging(logger, event, user_message, messages, trace_summary):
+    """What process_message/handle_message log per message now"""
+    logger.debug("Queueing message in thread %s (channel %s): %s", event["thread_ts"], event["channel"], redact(user_message))
+    logger.debug("Processing message in thread %s: %s", event["thread_ts"], redact(user_message))
+    logger.info("Request trace: %s", Lazy(trace_summary))
+
+
+def make_legacy_logger(stream):
+    logger = logging.getLogger("bench.legacy")
+    logger.propagate = False
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.INFO)
+    return logger, None
+
+
+def make_current_logger(stream, level):
+    logger = logging.getLogger(f"bench.current.{logging.getLevelName(level)}")
+    logger.propagate = False
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    log_queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(1.0))
+    logger.handlers[:] = [queue_handler]
+    logger.setLevel(level)
+    listener = logging.handlers.QueueListener(log_queue, output)
+    listener.start()
+    return logger, listener
+
+
+def measure(log_fn, logger, messages, iterations):
+    event = {"thread_ts": "1700000000.000100", "channel": "D000BENCH"}
+    user_message = "¿Cuánto vive una tortuga marina?"
+    trace_summary = lambda: "queue_wait=1.2ms llm=812.4ms slack.say=45.0ms total=861.0ms"
+    start = time.perf_counter()
+    for _ in range(iterations):
+        log_fn(logger, event, user_message, messages, trace_summary)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-message logging overhead at various thread lengths")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 50, 200], help="messages in the thread")
+    parser.add_argument("--iterations", type=int, default=300, help="simulated messages per measurement")
+    args = parser.parse_args()
+
+    print("🪵 Logging overhead per message (caller thread)")
+    print("=" * 60)
+    print(f"{'history':>8}  {'legacy INFO':>12}  {'current INFO':>13}  {'current WARNING':>16}")
+    for length in args.lengths:
+        messages = build_history(length)
+        results = []
+        for make in (make_legacy_logger,
+                     lambda stream: make_current_logger(stream, logging.INFO),
+                     lambda stream: make_current_logger(stream, logging.WARNING)):
+            logger, listener = make(io.StringIO())
+            # The legacy variant also pays for `print` in the agent; stdout is
+            # left out here so the numbers only compare the logging paths
+            seconds = measure(
+                legacy_logging if listener is None else current_logging, logger, messages, args.iterations
+            )
+            if listener is not None:
+                listener.stop()
+            results.append(seconds * 1e6)
+        print(f"{length:>8}  {results[0]:>9.1f} µs  {results[1]:>10.1f} µs  {results[2]:>13.1f} µs")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Animales Agent
+Measures cold-start import time, lazy graph construction and (optionally) the
+latency of the first reply, each in a fresh Python process.
+
+Usage:
+    python benchmarks/bench_startup.py                 # import + graph build
+    python benchmarks/bench_startup.py --first-reply   # also first reply (needs GEMINI_API_KEY)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet runs in a new interpreter and prints the elapsed seconds as JSON
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import animales_agent
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+BUILD_SNIPPET = """
+import json, os, time
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-placeholder")
+import animales_agent
+start = time.perf_counter()
+animales_agent.get_animales_agent()
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+FIRST_REPLY_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import animales_agent
+animales_agent.run_agent("¿Cuántas patas tiene un gato?", use_cache=False)
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+def run_snippet(snippet: str) -> float:
+    """Run a snippet in a fresh interpreter and return the seconds it reported"""
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The agent prints its progress, the measurement is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])["seconds"]
+
+
+def measure(name: str, snippet: str, runs: int) -> None:
+    samples = [run_snippet(snippet) for _ in range(runs)]
+    print(
+        f"{name:<14} median={statistics.median(samples) * 1000:8.1f} ms  "
+        f"min={min(samples) * 1000:8.1f} ms  max={max(samples) * 1000:8.1f} ms  (n={runs})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Animales Agent startup latency")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--first-reply", action="store_true", help="also measure the first reply (live Gemini call)")
+    args = parser.parse_args()
+
+    print("🚀 Startup benchmark")
+    print("=" * 50)
+    measure("import", IMPORT_SNIPPET, args.runs)
+    measure("graph build", BUILD_SNIPPET, args.runs)
+    if args.first_reply:
+        if not os.getenv("GEMINI_API_KEY"):
+            print("⚠️  GEMINI_API_KEY not set, skipping first reply")
+        else:
+            measure("first reply", FIRST_REPLY_SNIPPET, args.runs)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
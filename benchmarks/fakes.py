@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Offline stand-ins for benchmarks
+A deterministic fake chat model and a local fake of the Slack Web API, so the
+agent and the Slack app can be driven without network access.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, List, Optional, Set
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+ANSWER_WORDS = (
+    "Los animales tienen adaptaciones sorprendentes para sobrevivir en su hábitat "
+    "y cada especie ha desarrollado comportamientos únicos"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with configurable latency and output size
+
+    The first token arrives after first_token_latency seconds and each
+    following token after token_latency seconds. Replies are deterministic
+    and never request tools. Like Gemini's implicit caching, a leading system
+    message seen before is reported as cached input (cache_read).
+    """
+
+    output_tokens: int = 60
+    first_token_latency: float = 0.2
+    token_latency: float = 0.005
+    _seen_prefixes: Set[str] = PrivateAttr(default_factory=set)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _tokens(self) -> List[str]:
+        return [ANSWER_WORDS[index % len(ANSWER_WORDS)] + " " for index in range(self.output_tokens)]
+
+    def _cached_prefix_tokens(self, messages: List[BaseMessage]) -> int:
+        if not messages or messages[0].type != "system":
+            return 0
+        prefix = str(messages[0].content)
+        with self._lock:
+            cached = prefix in self._seen_prefixes
+            self._seen_prefixes.add(prefix)
+        return len(prefix) // 4 if cached else 0
+
+    def _usage(self, messages: List[BaseMessage]):
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": input_tokens + self.output_tokens,
+            "input_token_details": {"cache_read": self._cached_prefix_tokens(messages)},
+        }
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.first_token_latency + self.token_latency * (self.output_tokens - 1))
+        message = AIMessage(content="".join(self._tokens()).strip(), usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens = self._tokens()
+        for index, token in enumerate(tokens):
+            time.sleep(self.first_token_latency if index == 0 else self.token_latency)
+            usage = self._usage(messages) if index == len(tokens) - 1 else None
+            # BaseChatModel reports each chunk to the callbacks (LangGraph's messages stream)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+
+
+class FakeSlackServer:
+    """Local HTTP server answering every Slack Web API method with ok=true
+
+    Point slack_sdk at it with SLACK_API_BASE_URL=server.base_url.
+    """
+
+    def __init__(self, latency: float = 0.02, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-slack", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    def start(self) -> "FakeSlackServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+
+    def _record(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] += 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.rsplit("/", 1)[-1]
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server._record(method)
+                time.sleep(server.latency)
+                body = json.dumps({
+                    "ok": True,
+                    "ts": f"{time.time():.6f}",
+                    "channel": "C000BENCH",
+                    # auth.test fields used by Bolt at startup
+                    "user_id": "U000BENCH",
+                    "bot_id": "B000BENCH",
+                    "team_id": "T000BENCH",
+                    "url": "https://bench.slack.com/",
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the Slack app and the agent
+Drives handle_message (or run_agent directly) with synthetic Slack events,
+using FakeChatModel instead of Gemini and FakeSlackServer instead of the
+Slack Web API, so it needs no network and no credentials.
+
+Usage:
+    python benchmarks/load_test.py --messages 200 --threads 20 --rate 20
+    python benchmarks/load_test.py --target agent --messages 100 --threads 10
+    python benchmarks/load_test.py --max-p95-ms 2000 --min-throughput 5   # CI gate, exits 1 on failure
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from fakes import FakeChatModel, FakeSlackServer
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux), 0 if unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def question(thread_index: int, message_index: int) -> str:
+    # Unique questions so the response cache doesn't hide the agent's cost
+    return f"¿Qué comen los animales del hilo {thread_index}? (mensaje {message_index})"
+
+
+def configure_environment(args, slack_base_url: str) -> None:
+    """Point the app at the fakes before any project module reads its config"""
+    os.environ.update({
+        "SLACK_BOT_TOKEN": "xoxb-benchmark",
+        "GEMINI_API_KEY": "benchmark-placeholder",
+        "SLACK_API_BASE_URL": slack_base_url,
+        "METRICS_ENABLED": "false",
+        "PROMPT_WARMUP_ENABLED": "false",
+        "AGENT_MAX_WORKERS": str(args.workers),
+        "AGENT_MAX_CONCURRENT_RUNS": str(args.workers),
+        "RATE_LIMIT_ENABLED": "false",
+        "AGENT_MAX_QUEUE_DEPTH": str(max(args.messages, 1)),
+        "SLACK_STREAMING_ENABLED": "true" if args.streaming else "false",
+    })
+
+
+def run_slack_load(args) -> Tuple[List[float], float]:
+    """Send synthetic message events through slack_app.handle_message"""
+    import slack_app
+
+    started: Dict[Tuple[str, str], float] = {}
+    latencies: List[float] = []
+    lock = threading.Lock()
+    all_done = threading.Event()
+    original_process_message = slack_app.process_message
+
+    def timed_process_message(channel_id, thread_ts, user_message, *rest, **kwargs):
+        try:
+            original_process_message(channel_id, thread_ts, user_message, *rest, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            with lock:
+                latencies.append(finished - started[(thread_ts, user_message)])
+                if len(latencies) == args.messages:
+                    all_done.set()
+
+    slack_app.process_message = timed_process_message
+    client = slack_app.app.client
+
+    def make_say(channel_id):
+        # Same Web API call Bolt's say() makes
+        def say(text, thread_ts=None):
+            return client.chat_postMessage(channel=channel_id, thread_ts=thread_ts, text=text)
+        return say
+
+    begin = time.perf_counter()
+    for index in range(args.messages):
+        if args.rate > 0:
+            delay = begin + index / args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        thread_index = index % args.threads
+        thread_ts = f"1700000000.{thread_index:06d}"
+        text = question(thread_index, index)
+        event = {
+            "type": "message",
+            "channel": "D000BENCH",
+            "user": f"U{thread_index:08d}",
+            "text": text,
+            "client_msg_id": f"bench-{index:08d}",
+            "ts": f"{time.time():.6f}",
+            "thread_ts": thread_ts,
+        }
+        with lock:
+            started[(thread_ts, text)] = time.perf_counter()
+        body = {"type": "event_callback", "event_id": f"Ev{index:08d}", "event": event}
+        slack_app.handle_message(event, make_say(event["channel"]), client, body)
+
+    if not all_done.wait(timeout=args.timeout):
+        print(f"⚠️  Timed out with {len(latencies)}/{args.messages} messages processed")
+    elapsed = time.perf_counter() - begin
+    slack_app.dispatcher.shutdown(wait=False)
+    return latencies, elapsed
+
+
+def run_agent_load(args) -> Tuple[List[float], float]:
+    """Call run_agent directly; each synthetic thread is a sequential conversation"""
+    import animales_agent
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+    per_thread = [list(range(index, args.messages, args.threads)) for index in range(args.threads)]
+
+    def conversation(thread_index: int, message_indexes: List[int]) -> None:
+        state = None
+        for index in message_indexes:
+            start = time.perf_counter()
+            result = animales_agent.run_agent(question(thread_index, index), state)
+            state = result.state if result else None
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for thread_index, indexes in enumerate(per_thread):
+            executor.submit(conversation, thread_index, indexes)
+    return latencies, time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test with a fake LLM and a fake Slack API")
+    parser.add_argument("--target", choices=["slack", "agent"], default="slack", help="entry point to drive")
+    parser.add_argument("--messages", type=int, default=100, help="total messages to send")
+    parser.add_argument("--threads", type=int, default=10, help="distinct Slack threads (conversations)")
+    parser.add_argument("--rate", type=float, default=0, help="messages per second (0 = as fast as possible)")
+    parser.add_argument("--workers", type=int, default=8, help="agent worker threads")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds to the first LLM token")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="seconds between LLM tokens")
+    parser.add_argument("--tokens", type=int, default=60, help="LLM output tokens per reply")
+    parser.add_argument("--slack-latency", type=float, default=0.02, help="fake Slack API latency in seconds")
+    parser.add_argument("--streaming", action="store_true", help="stream replies with chat.update")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for all replies")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if p95 latency is above this")
+    parser.add_argument("--min-throughput", type=float, help="fail if throughput (msg/s) is below this")
+    args = parser.parse_args()
+
+    slack_server = FakeSlackServer(latency=args.slack_latency).start()
+    configure_environment(args, slack_server.base_url)
+
+    import animales_agent
+    animales_agent.set_llm(FakeChatModel(
+        output_tokens=args.tokens,
+        first_token_latency=args.llm_latency,
+        token_latency=args.token_latency,
+    ))
+    animales_agent.get_animales_agent()
+
+    rss_before = rss_bytes()
+    # Keep any console output from the app out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        if args.target == "slack":
+            import slack_app  # noqa: F401  (configures logging on import)
+            logging.getLogger().setLevel(logging.WARNING)
+            latencies, elapsed = run_slack_load(args)
+        else:
+            latencies, elapsed = run_agent_load(args)
+    rss_after = rss_bytes()
+    slack_server.stop()
+
+    throughput = len(latencies) / elapsed if elapsed else 0.0
+    p50, p95, p99 = (percentile(latencies, pct) * 1000 for pct in (50, 95, 99))
+
+    print(f"🚀 Load test ({args.target})")
+    print("=" * 50)
+    print(f"Messages:     {len(latencies)}/{args.messages} in {elapsed:.2f}s over {args.threads} threads")
+    print(f"Throughput:   {throughput:.2f} msg/s")
+    if latencies:
+        print(f"Latency:      p50={p50:.1f} ms  p95={p95:.1f} ms  p99={p99:.1f} ms  "
+              f"max={max(latencies) * 1000:.1f} ms  mean={statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"Memory (RSS): {rss_before / 2**20:.1f} MiB -> {rss_after / 2**20:.1f} MiB "
+          f"({(rss_after - rss_before) / 2**20:+.1f} MiB)")
+    from agent_runtime.metrics import LLM_TOKENS
+    input_tokens, cached_tokens = LLM_TOKENS.value(direction="input"), LLM_TOKENS.value(direction="cached")
+    if input_tokens:
+        print(f"LLM tokens:   input={input_tokens:.0f} cached={cached_tokens:.0f} "
+              f"({cached_tokens / input_tokens:.0%} of the input served from the prompt prefix cache)")
+    if slack_server.calls:
+        calls = ", ".join(f"{method}={count}" for method, count in sorted(slack_server.calls.items()))
+        print(f"Slack calls:  {calls}")
+    print("=" * 50)
+
+    failures = []
+    if len(latencies) < args.messages:
+        failures.append(f"only {len(latencies)}/{args.messages} messages completed")
+    if args.max_p95_ms is not None and p95 > args.max_p95_ms:
+        failures.append(f"p95 {p95:.1f} ms > {args.max_p95_ms} ms")
+    if args.min_throughput is not None and throughput < args.min_throughput:
+        failures.append(f"throughput {throughput:.2f} msg/s < {args.min_throughput} msg/s")
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures
+"""
+
+import pytest
+
+# Smoke script run by hand against the real model (python test_animales_agent.py), not a unit test
+collect_ignore = ["test_animales_agent.py"]
+
+
+class FakeClock:
+    """Stands in for the time module of the code under test, advanced by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch, request):
+    """A FakeClock installed as `time` in the modules listed in the test file's CLOCK_MODULES"""
+    fake = FakeClock()
+    for module in request.module.CLOCK_MODULES:
+        monkeypatch.setattr(module, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def use_llm(monkeypatch):
+    """set_llm for the agents, with a fresh LLM guard so one test's failures don't open another's circuit"""
+    import animales_agent
+    from agent_runtime.resilience import ResilientLLM
+
+    monkeypatch.setattr(animales_agent, "llm_guard", ResilientLLM(fallback_model=None))
+    yield animales_agent.set_llm
+    animales_agent.set_llm(None)
@@ -6,7 +6,11 @@ Integrates the Animales Agent with Slack's AI Apps feature
 
 import os
 import logging
-from typing import Dict, Any
+import queue
+import signal
+import threading
+import time
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,21 +18,75 @@ load_dotenv()
 
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
+from slack_bolt.context.say import Say
 from slack_sdk.errors import SlackApiError
 
 # Import our animales agent
-from animales_agent import run_agent
+from animales_agent import (
+    agent_registry, check_llm_config, llm_guard, load_agent_modules, response_cache, run_agent, warmup_answer,
+)
+from agent_runtime import config
+from agent_runtime.budget import TokenLedger
+from agent_runtime.conversation_store import create_conversation_store
+from agent_runtime.dedup import create_event_deduplicator, event_keys
+from agent_runtime.dispatcher import ThreadDispatcher
+from agent_runtime.logging_setup import Lazy, configure_logging, redact
+from agent_runtime.metrics import RATE_LIMITED, SLACK_MESSAGES, TracedClient, registry, start_metrics_server, start_trace, trace_span
+from agent_runtime.rate_limit import ConcurrencyLimiter, create_rate_limiter
+from agent_runtime.resilience import deadline_after
+from agent_runtime.slack_io import SlackIO, create_web_client
+from agent_runtime.slack_streaming import SlackStreamingReply
+from agent_runtime.supervisor import Supervisor, WorkerShard
+from agent_runtime.tool_cache import tool_cache_stats
+from agent_runtime.warmup import PromptWarmer
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (level-gated, sampled, written from a background thread)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize the Slack app
-app = App(token=os.environ.get("SLACK_BOT_TOKEN"))
+app = App(client=create_web_client())
 
+# Background sender for status updates and other calls that don't need to block a handler
+slack_io = SlackIO(app.client)
 
-# Store conversation states (thread_ts -> agent_state)
-conversation_states: Dict[str, Any] = {}
+
+# Store conversation states (thread_ts -> agent_state), bounded with LRU + TTL eviction
+conversation_states = create_conversation_store()
+
+# Recently handled event ids, so Slack's redeliveries don't run the agent twice
+handled_events = create_event_deduplicator()
+
+# Per-user/channel/workspace token buckets and the global cap on agent runs in flight
+rate_limiter = create_rate_limiter()
+agent_runs = ConcurrencyLimiter()
+
+# Worker pool that runs the agent off the Bolt listener thread, in order per thread_ts
+dispatcher = ThreadDispatcher()
+
+# Cumulative model tokens per Slack thread and per user (this worker's threads)
+thread_tokens = TokenLedger()
+user_tokens = TokenLedger()
+
+# This process's place among the supervisor's workers (None when running as a single process)
+worker_shard: Optional[WorkerShard] = None
+
+# Expose component stats next to the hot-path metrics
+registry.stats_gauge("agent_conversation_store", "Conversation store stats", conversation_states.stats)
+registry.stats_gauge("agent_dispatcher", "Message worker pool stats", dispatcher.stats)
+registry.stats_gauge("agent_event_dedup", "Slack event deduplication stats", handled_events.stats)
+registry.stats_gauge("agent_runs", "Agent runs in flight", agent_runs.stats)
+registry.stats_gauge("slack_io", "Background Slack call stats", slack_io.stats)
+registry.stats_gauge("agent_tool_cache", "Tool result cache stats", tool_cache_stats)
+registry.stats_gauge("agent_llm_circuit", "LLM circuit breaker stats", llm_guard.stats)
+registry.stats_gauge("agent_thread_token_ledger", "Per-thread token ledger stats", thread_tokens.stats)
+registry.stats_gauge("agent_user_token_ledger", "Per-user token ledger stats", user_tokens.stats)
+registry.gauge("agent_thread_tokens", "Model tokens used by the top threads", thread_tokens.samples, ["thread", "direction"])
+registry.gauge("agent_user_tokens", "Model tokens used by the top users", user_tokens.samples, ["user", "direction"])
+if rate_limiter is not None:
+    registry.stats_gauge("slack_rate_limiter", "Rate limiter stats", rate_limiter.stats)
+if response_cache is not None:
+    registry.stats_gauge("agent_response_cache", "Response cache stats", response_cache.stats)
 
 @app.event("assistant_thread_started")
 def handle_assistant_thread_started(event, say, client):
@@ -37,9 +95,7 @@ def handle_assistant_thread_started(event, say, client):
         thread_ts = event.get("thread_ts") or event.get("assistant_thread", {}).get("thread_ts")
         channel_id = event.get("context", {}).get("channel_id") or event.get("assistant_thread", {}).get("channel_id")
         
-        logger.info(f"New AI app thread started: {thread_ts}")
-        logger.info(f"Channel ID: {channel_id}")
-        logger.info(f"Full event: {event}")
+        logger.info("New AI app thread started: %s (channel %s)", thread_ts, channel_id)
         
         # For AI apps, channel_id might be in different location
         if not channel_id:
@@ -50,39 +106,18 @@ def handle_assistant_thread_started(event, say, client):
             logger.error("No channel_id found in event")
             return
         
-        # Set initial status
-        client.assistant_threads_setStatus(
+        # Set suggested prompts in the background, the welcome message doesn't depend on them
+        # (no initial status: the welcome message below would clear it right away)
+        slack_io.call(
+            "assistant_threads_setSuggestedPrompts",
             channel_id=channel_id,
             thread_ts=thread_ts,
-            status="🐾 Iniciando agente de animales..."
-        )
-        
-        # Set suggested prompts with correct format
-        client.assistant_threads_setSuggestedPrompts(
-            channel_id=channel_id,
-            thread_ts=thread_ts,
-            prompts=[
-                {
-                    "title": "Animales rápidos",
-                    "message": "¿Cuáles son los animales más rápidos del mundo?"
-                },
-                {
-                    "title": "Animal más grande",
-                    "message": "What is the largest animal on Earth?"
-                },
-                {
-                    "title": "Gatos",
-                    "message": "¿Por qué los gatos ronronean?"
-                },
-                {
-                    "title": "Pingüinos",
-                    "message": "How do penguins survive in cold weather?"
-                }
-            ]
+            prompts=config.suggested_prompts_for_slack()
         )
         
         # Send welcome message
-        welcome_message = """🐾 **Bienvenido al Agente de Animales**
+        examples = "\n".join(f"• {prompt['message']}" for prompt in config.SUGGESTED_PROMPTS)
+        welcome_message = f"""🐾 **Bienvenido al Agente de Animales**
 
 Soy tu asistente especializado en responder preguntas sobre animales. Puedo ayudarte con:
 
@@ -93,10 +128,7 @@ Soy tu asistente especializado en responder preguntas sobre animales. Puedo ayud
 • 🦋 Datos curiosos sobre animales
 
 **Ejemplos de preguntas:**
-• ¿Cuáles son los animales más rápidos del mundo?
-• What is the largest animal on Earth?
-• ¿Por qué los gatos ronronean?
-• How do penguins survive in cold weather?
+{examples}
 
 ¡Hazme cualquier pregunta sobre animales!"""
         
@@ -115,14 +147,18 @@ def handle_assistant_thread_context_changed(event, say, client):
         thread_ts = event.get("thread_ts") or event.get("assistant_thread", {}).get("thread_ts")
         context = event.get("context", {})
         
-        logger.info(f"AI app context changed: {thread_ts} -> {context}")
+        logger.debug("AI app context changed: %s -> %s", thread_ts, context)
         
     except Exception as e:
         logger.error(f"Error in assistant_thread_context_changed: {e}")
 
 @app.event("message")
-def handle_message(event, say, client):
-    """Handle incoming messages in AI app threads"""
+def handle_message(event, say, client, body=None):
+    """Handle incoming messages in AI app threads
+
+    Bolt acknowledges the event before this listener runs and the agent work
+    is handed to the dispatcher, so the listener returns right away.
+    """
     try:
         # Only handle messages in AI app threads
         thread_ts = event.get("thread_ts") or event.get("assistant_thread", {}).get("thread_ts")
@@ -131,7 +167,6 @@ def handle_message(event, say, client):
             
         channel_id = event.get("channel")
         user_message = event.get("text", "").strip()
-        user_id = event.get("user")
         
         # Skip bot messages
         if event.get("bot_id"):
@@ -141,111 +176,259 @@ def handle_message(event, say, client):
         if not user_message:
             return
             
-        logger.info(f"Processing message in thread {thread_ts}: {user_message}")
-        logger.info(f"Channel ID: {channel_id}")
+        logger.debug("Queueing message in thread %s (channel %s): %s", thread_ts, channel_id, redact(user_message))
         
         if not channel_id:
             logger.error("No channel_id found in message event")
             return
         
-        # Set status to show we're processing
-        client.assistant_threads_setStatus(
-            channel_id=channel_id,
-            thread_ts=thread_ts,
-            status="🐾 Buscando información sobre animales..."
-        )
+        # With several worker processes, each thread is handled by the worker that owns it
+        # (its conversation state, dedup and ordering live there); forward the others
+        if worker_shard is not None and worker_shard.forward(thread_ts, (event, body)):
+            SLACK_MESSAGES.inc(outcome="forwarded")
+            return
+        
+        # Slack redelivers events it considers unacknowledged; handle each message once
+        if not handled_events.claim(event_keys(event, body)):
+            SLACK_MESSAGES.inc(outcome="duplicate")
+            logger.info("Skipping duplicate delivery of event %s in thread %s", (body or {}).get("event_id"), thread_ts)
+            return
+        
+        # One chatty user or channel must not use up the model quota for everyone
+        if rate_limiter is not None:
+            limited = rate_limiter.acquire({
+                "user": event.get("user"),
+                "channel": channel_id,
+                "workspace": (body or {}).get("team_id") or event.get("team"),
+            })
+            if limited is not None:
+                scope, retry_after = limited
+                RATE_LIMITED.inc(scope=scope)
+                SLACK_MESSAGES.inc(outcome="rate_limited")
+                logger.info("Rate limited message in thread %s (%s)", thread_ts, scope)
+                say(
+                    text=f"🐾 Estoy recibiendo muchas preguntas seguidas. Por favor, espera unos {max(1, round(retry_after))} segundos y vuelve a intentarlo.",
+                    thread_ts=thread_ts
+                )
+                return
+        
+        # Hand the work to the pool so the listener returns right away;
+        # messages of the same thread are still processed in order.
+        # The deadline counts from now, so time spent queued is part of it
+        queued_at = time.perf_counter()
+        deadline = deadline_after()
+        if dispatcher.submit(
+            thread_ts, process_message, channel_id, thread_ts, user_message, say, client, queued_at, deadline,
+            event.get("user")
+        ):
+            SLACK_MESSAGES.inc(outcome="queued")
+        else:
+            SLACK_MESSAGES.inc(outcome="rejected")
+            logger.warning(f"Dispatcher queue full, rejecting message in thread {thread_ts}")
+            say(
+                text="🐾 Estoy respondiendo muchas preguntas en este momento. Por favor, intenta de nuevo en unos segundos.",
+                thread_ts=thread_ts
+            )
+        
+    except Exception as e:
+        logger.error(f"Error in message handler: {e}")
+        try:
+            # Try to send error message
+            thread_ts = event.get("thread_ts") or event.get("assistant_thread", {}).get("thread_ts")
+            say(
+                text="❌ Ocurrió un error inesperado. Por favor, intenta de nuevo.",
+                thread_ts=thread_ts
+            )
+        except:
+            pass
+
+def process_message(channel_id, thread_ts, user_message, say, client, queued_at=None, deadline=None, user_id=None):
+    """Run the agent for one message and post the reply (runs on the dispatcher pool)"""
+    trace = start_trace(thread_ts=thread_ts)
+    if queued_at is not None:
+        trace.add("queue_wait", time.perf_counter() - queued_at)
+    # Time every Slack Web API call made while handling this message
+    client = TracedClient(client)
+    acquired = False
+    try:
+        logger.debug("Processing message in thread %s: %s", thread_ts, redact(user_message))
+        
+        # Wait for a free agent slot, showing a queued status meanwhile; shed the message on timeout
+        acquired = agent_runs.try_acquire()
+        if not acquired:
+            slack_io.set_status(channel_id, thread_ts, "🐾 En cola, hay muchas preguntas en este momento...")
+            with trace_span("run_slot_wait"):
+                acquired = agent_runs.acquire(timeout=config.AGENT_RUN_QUEUE_TIMEOUT)
+        if not acquired:
+            SLACK_MESSAGES.inc(outcome="shed")
+            logger.warning(f"No agent slot after {config.AGENT_RUN_QUEUE_TIMEOUT}s, shedding message in thread {thread_ts}")
+            slack_io.before_reply(channel_id, thread_ts)
+            say(
+                text="🐾 Estoy respondiendo muchas preguntas en este momento. Por favor, intenta de nuevo en unos segundos.",
+                thread_ts=thread_ts
+            )
+            return
         
         # Get previous state for this thread
         previous_state = conversation_states.get(thread_ts)
         
+        # A thread stays with the agent that answered its first message
+        agent_name = (previous_state or {}).get("agent") or agent_registry.select(channel_id, user_message)
+        
+        # Stream the answer into a placeholder message, or post it once at the end.
+        # Slack clears the thread status when the app replies, so there is no final
+        # "clear status" call, and the placeholder itself shows that we're working.
+        streaming_reply = None
+        if config.SLACK_STREAMING_ENABLED:
+            slack_io.before_reply(channel_id, thread_ts)
+            streaming_reply = SlackStreamingReply(client, channel_id, thread_ts, io=slack_io)
+            streaming_reply.start()
+        else:
+            slack_io.set_status(channel_id, thread_ts, "🐾 Buscando información sobre animales...")
+        
+        def reply(text):
+            if streaming_reply:
+                streaming_reply.finish(text)
+            else:
+                slack_io.before_reply(channel_id, thread_ts)
+                with trace_span("slack.say"):
+                    say(text=text, thread_ts=thread_ts)
+        
         # Run the animales agent
         try:
-            logger.info(f"Calling run_agent with message: {user_message}")
-            final_state = run_agent(user_message, previous_state)
-            logger.info(f"run_agent returned: {final_state is not None}")
-            
-            if final_state:
-                # Store the updated state
-                conversation_states[thread_ts] = final_state
-                
-                logger.info(f"Final state messages count: {len(final_state.get('messages', []))}")
+            result = run_agent(
+                user_message,
+                previous_state,
+                on_token=streaming_reply.append if streaming_reply else None,
+                agent=agent_name,
+                deadline=deadline
+            )
+            if result:
+                # Store the updated state (a degraded answer leaves the conversation as it was)
+                if result.source != "degraded":
+                    result.state["agent"] = agent_name
+                    conversation_states.set(thread_ts, result.state)
                 
-                # Get the last AI message (skip tool messages)
-                last_ai_message = None
-                for i, message in enumerate(reversed(final_state["messages"])):
-                    logger.info(f"Message {i}: type={type(message)}, content={getattr(message, 'content', 'NO_CONTENT')[:100] if hasattr(message, 'content') else 'NO_CONTENT'}")
-                    
-                    # Skip tool messages and messages with tool calls
-                    if (hasattr(message, 'content') and 
-                        message.content and 
-                        not message.content.startswith('{') and  # Skip JSON tool results
-                        'AIMessage' in str(type(message))):  # Only AI messages
-                        last_ai_message = message.content
-                        logger.info(f"Found AI message: {last_ai_message[:100]}")
-                        break
+                # Account the run's tokens to the thread and the user who asked
+                thread_tokens.add(thread_ts, result.usage["input"], result.usage["output"])
+                if user_id:
+                    user_tokens.add(user_id, result.usage["input"], result.usage["output"])
                 
-                if last_ai_message:
+                if result.answer:
                     # Send response back to Slack
-                    say(
-                        text=last_ai_message,
-                        thread_ts=thread_ts
-                    )
+                    reply(result.answer)
                 else:
-                    # If no AI message found, send a default response
-                    say(
-                        text="🐾 Estoy buscando información sobre animales. ¿Qué animal te interesa conocer?",
-                        thread_ts=thread_ts
-                    )
+                    # If the model gave no text answer, send a default response
+                    reply("🐾 Estoy buscando información sobre animales. ¿Qué animal te interesa conocer?")
             else:
-                say(
-                    text="❌ Ocurrió un error al procesar tu pregunta. Por favor, intenta de nuevo.",
-                    thread_ts=thread_ts
-                )
+                reply("❌ Ocurrió un error al procesar tu pregunta. Por favor, intenta de nuevo.")
                 
         except Exception as agent_error:
             logger.error(f"Agent error: {agent_error}")
-            say(
-                text=f"❌ Error en el agente: {str(agent_error)}",
-                thread_ts=thread_ts
-            )
+            reply(f"❌ Error en el agente: {str(agent_error)}")
         
-        # Clear status
-        if channel_id:
-            client.assistant_threads_setStatus(
-                channel_id=channel_id,
-                thread_ts=thread_ts,
-                status=""
-            )
+        SLACK_MESSAGES.inc(outcome="processed")
         
     except Exception as e:
-        logger.error(f"Error in message handler: {e}")
+        SLACK_MESSAGES.inc(outcome="failed")
+        logger.error(f"Error processing message: {e}")
         try:
             # Try to send error message
-            thread_ts = event.get("thread_ts") or event.get("assistant_thread", {}).get("thread_ts")
+            slack_io.before_reply(channel_id, thread_ts)
             say(
                 text="❌ Ocurrió un error inesperado. Por favor, intenta de nuevo.",
                 thread_ts=thread_ts
             )
         except:
             pass
+    finally:
+        if acquired:
+            agent_runs.release()
+        logger.info("Request trace: %s", Lazy(trace.summary))
 
 @app.error
 def custom_error_handler(error, body, logger):
     """Handle errors"""
     logger.exception(f"Error: {error}")
-    logger.info(f"Request body: {body}")
+    logger.debug("Request body: %s", body)
+
+def consume_forwarded(shard: WorkerShard, stopping: threading.Event):
+    """Handle the messages other workers forward to this one, until stopping and the inbox is empty"""
+    inbox = shard.inboxes[shard.index]
+    while True:
+        try:
+            event, body = inbox.get(timeout=0.5)
+        except queue.Empty:
+            if stopping.is_set():
+                return
+            continue
+        handle_message(event, Say(app.client, event.get("channel")), app.client, body)
+
+def run_worker(shard: Optional[WorkerShard] = None):
+    """Serve one Socket Mode connection until SIGTERM/SIGINT, then drain in-flight messages"""
+    global worker_shard
+    worker_shard = shard
+    index = shard.index if shard else 0
+    check_llm_config()
+    
+    # Other domain agents served by this same process (AGENT_MODULES)
+    load_agent_modules()
+    logger.info(f"Agents: {', '.join(agent_registry.names())} (default: {agent_registry.default})")
+    
+    if config.METRICS_ENABLED:
+        # One port per worker process
+        start_metrics_server(port=config.METRICS_PORT + index)
+    
+    # Precompute the suggested prompts' answers so the first click is served from the cache
+    if config.PROMPT_WARMUP_ENABLED and response_cache is not None:
+        PromptWarmer(warmup_answer, response_cache, config.suggested_prompt_questions()).start()
+    
+    stopping = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.set())
+    forwarded = None
+    if shard is not None:
+        forwarded = threading.Thread(target=consume_forwarded, args=(shard, stopping), name="forwarded-messages")
+        forwarded.start()
+    
+    # Start the app
+    handler = SocketModeHandler(app, os.environ["SLACK_SOCKET_TOKEN"])
+    logger.info("🐾 Starting Slack Animales Agent..." + (f" (worker {index + 1}/{shard.count})" if shard else ""))
+    handler.connect()
+    supervisor_pid = os.getppid()
+    while not stopping.wait(1.0):
+        # A worker whose supervisor died (e.g. killed with SIGKILL) stops on its own
+        if shard is not None and os.getppid() != supervisor_pid:
+            logger.warning("Supervisor is gone, stopping worker")
+            stopping.set()
+    
+    # Stop receiving events, then let the messages already accepted finish
+    logger.info(f"Shutting down: draining in-flight messages (up to {config.SHUTDOWN_DRAIN_SECONDS:.0f}s)")
+    handler.close()
+    if forwarded is not None:
+        forwarded.join(timeout=config.SHUTDOWN_DRAIN_SECONDS)
+    if dispatcher.shutdown(wait=True, timeout=config.SHUTDOWN_DRAIN_SECONDS):
+        logger.info("All in-flight messages finished")
+    else:
+        logger.warning(f"Stopped with messages still in flight: {dispatcher.stats()}")
+    slack_io.shutdown(wait=True)
 
 def main():
-    """Start the Slack app"""
+    """Start the Slack app: one worker process, or a supervisor of SLACK_WORKERS processes"""
     if not os.environ.get("SLACK_BOT_TOKEN"):
         raise ValueError("SLACK_BOT_TOKEN environment variable is required")
     if not os.environ.get("SLACK_SOCKET_TOKEN"):
         raise ValueError("SLACK_SOCKET_TOKEN environment variable is required")
+    check_llm_config()
     
-    # Start the app
-    handler = SocketModeHandler(app, os.environ["SLACK_SOCKET_TOKEN"])
-    logger.info("🐾 Starting Slack Animales Agent...")
-    handler.start()
+    if config.SLACK_WORKERS <= 1:
+        run_worker()
+        return
+    
+    if config.CONVERSATION_STORE_BACKEND == "memory":
+        logger.warning("CONVERSATION_STORE_BACKEND=memory: a restarted worker loses its threads' "
+                       "conversations, use 'sqlite' with SLACK_WORKERS > 1")
+    Supervisor(run_worker, config.SLACK_WORKERS).run()
 
 if __name__ == "__main__":
     main()
@@ -29,6 +29,8 @@ if [ -z "$SLACK_SOCKET_TOKEN" ]; then
 fi
 
 echo "✅ Variables de entorno configuradas correctamente"
+# Worker processes (SLACK_WORKERS > 1 starts a supervisor that shards threads across them)
+echo "⚙️  Procesos worker: ${SLACK_WORKERS:-1}"
 echo "🐾 Iniciando agente de animales en modo DEBUG..."
 echo "📝 Logs se guardarán en: slack_app_debug.log"
 echo "🔄 Para detener: Ctrl+C o 'kill \$(cat slack_app.pid)'"
@@ -2,20 +2,42 @@
 
 echo "🛑 Deteniendo Slack Animales Agent..."
 
+# Seconds the app waits for in-flight messages (SHUTDOWN_DRAIN_SECONDS in .env)
+if [ -f .env ]; then
+    source .env
+fi
+DRAIN_SECONDS=${SHUTDOWN_DRAIN_SECONDS:-30}
+DRAIN_SECONDS=${DRAIN_SECONDS%.*}
+
+# Kill a process and all its descendants (supervisor and worker processes)
+kill_tree() {
+    local pid=$1
+    for child in $(pgrep -P "$pid"); do
+        kill_tree "$child"
+    done
+    kill -9 "$pid" 2>/dev/null
+}
+
 if [ -f slack_app.pid ]; then
     PID=$(cat slack_app.pid)
     echo "📊 Proceso encontrado con PID: $PID"
     
     # Check if process is still running
     if ps -p $PID > /dev/null; then
-        echo "🔄 Deteniendo proceso..."
+        echo "🔄 Deteniendo proceso (esperando hasta ${DRAIN_SECONDS}s a que terminen las respuestas en curso)..."
         kill $PID
-        sleep 2
+        
+        # Wait for the in-flight messages to finish, plus a margin
+        WAITED=0
+        while ps -p $PID > /dev/null && [ $WAITED -lt $((DRAIN_SECONDS + 15)) ]; do
+            sleep 1
+            WAITED=$((WAITED + 1))
+        done
         
         # Check if process was killed
         if ps -p $PID > /dev/null; then
             echo "⚠️  Proceso no se detuvo, forzando..."
-            kill -9 $PID
+            kill_tree $PID
         else
             echo "✅ Proceso detenido correctamente"
         fi
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for batch answering of question files
+"""
+
+import json
+from typing import Dict, NamedTuple, Optional
+
+import pytest
+
+from agent_runtime.batch import answer_file, read_questions
+
+
+class FakeResult(NamedTuple):
+    answer: Optional[str]
+    source: str = "model"
+    tool_calls: int = 0
+    usage: Dict[str, int] = {"input": 1, "output": 1, "cached": 0}
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class FakeAnswerer:
+    """answer_batch stand-in: answers in reverse order, failing the questions in `fail`"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.asked = []
+
+    def __call__(self, questions):
+        self.asked.extend(questions)
+        for index in reversed(range(len(questions))):
+            question = questions[index]
+            yield index, RuntimeError("no model") if question in self.fail else FakeResult(f"re: {question}")
+
+
+def test_read_questions(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    write_lines(path, ['{"id": "q1", "question": "¿Perros?", "expected": "sí"}', '"¿Gatos?"', ""])
+    questions = read_questions(str(path))
+    assert [(q.id, q.question, q.extra) for q in questions] == [("q1", "¿Perros?", {"expected": "sí"}), ("2", "¿Gatos?", {})]
+
+    write_lines(path, ['{"id": "q1"}'])
+    with pytest.raises(ValueError):
+        read_questions(str(path))
+
+
+def test_answers_are_written_with_the_input_fields(tmp_path):
+    questions, output = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    write_lines(questions, ['{"id": "q1", "question": "¿Perros?", "answer": "input field"}', '{"id": "q2", "question": "¿Gatos?"}'])
+
+    stats = answer_file(str(questions), str(output), FakeAnswerer(fail=["¿Gatos?"]))
+    records = {record["id"]: record for record in read_records(output)}
+    assert records["q1"]["answer"] == "re: ¿Perros?"
+    assert records["q1"]["usage"] == {"input": 1, "output": 1, "cached": 0}
+    assert records["q2"]["error"] == "RuntimeError: no model"
+    assert "answer" not in records["q2"]
+    assert (stats["answered"], stats["failed"], stats["skipped"]) == (1, 1, 0)
+
+
+def test_resume_skips_answered_and_retries_failed_questions(tmp_path):
+    questions, output = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    write_lines(questions, [json.dumps({"id": f"q{i}", "question": f"¿Animal {i}?"}) for i in range(4)])
+    answer_file(str(questions), str(output), FakeAnswerer(fail=["¿Animal 1?"]))
+
+    # An interrupted run leaves its last line cut short
+    with open(output, "a", encoding="utf-8") as file:
+        file.write('{"id": "q3", "question": "¿Anim')
+
+    answerer = FakeAnswerer()
+    stats = answer_file(str(questions), str(output), answerer)
+    assert answerer.asked == ["¿Animal 1?"]
+    assert (stats["skipped"], stats["answered"]) == (3, 1)
+
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert lines[-2] == '{"id": "q3", "question": "¿Anim'
+    last = {}
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        last[record["id"]] = record
+    assert all("answer" in record for record in last.values()) and len(last) == 4
+
+
+def test_without_resume_the_output_is_overwritten(tmp_path):
+    questions, output = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    write_lines(questions, ['{"id": "q1", "question": "¿Perros?"}'])
+    write_lines(output, ['{"id": "q1", "answer": "old"}'])
+
+    answerer = FakeAnswerer()
+    answer_file(str(questions), str(output), answerer, resume=False)
+    assert answerer.asked == ["¿Perros?"]
+    assert [record["answer"] for record in read_records(output)] == ["re: ¿Perros?"]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for run budgets and token ledgers
+"""
+
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+import animales_agent
+from agent_runtime.budget import RunBudget, TokenLedger
+from agent_runtime.response_cache import ResponseCache
+
+NO_LIMITS = RunBudget(llm_steps=0, tool_calls=0, seconds=0, input_tokens=0, output_tokens=0)
+
+
+class LoopingChatModel(BaseChatModel):
+    """Chat model that asks for the date again on every step and never answers"""
+
+    text: str = ""
+    _calls: Any = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "looping"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self._calls += 1
+        call = {"name": "get_current_datetime", "args": {}, "id": f"call-{self._calls}", "type": "tool_call"}
+        usage = {"input_tokens": 1000, "output_tokens": 20, "total_tokens": 1020}
+        message = AIMessage(content=self.text, tool_calls=[call], usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_run_stops_after_its_llm_steps(use_llm):
+    model = LoopingChatModel()
+    use_llm(model)
+    result = animales_agent.run_agent("¿Qué hora es en el zoo?", use_cache=False, budget=NO_LIMITS._replace(llm_steps=3))
+
+    assert model._calls == 3
+    assert result.source == "model"
+    assert result.answer == animales_agent.BUDGET_MESSAGES["es"]
+    # The third step's tool call is answered without running it
+    assert result.tool_calls == 2
+    skipped = [m for m in result.new_messages if m.type == "tool" and m.artifact == animales_agent.BUDGET_SKIPPED]
+    assert len(skipped) == 1
+    assert result.usage["input"] == 3000 and result.usage["output"] == 60
+
+
+def test_budget_reply_keeps_the_models_text_and_language(use_llm):
+    use_llm(LoopingChatModel())
+    result = animales_agent.run_agent("What do zoo animals eat?", use_cache=False, budget=NO_LIMITS._replace(llm_steps=1))
+    assert result.answer == animales_agent.BUDGET_MESSAGES["en"]
+
+    use_llm(LoopingChatModel(text="Los pandas comen bambú."))
+    result = animales_agent.run_agent("¿Qué come un panda?", use_cache=False, budget=NO_LIMITS._replace(llm_steps=1))
+    assert result.answer == "Los pandas comen bambú."
+
+
+def test_token_budget_stops_the_run(use_llm):
+    model = LoopingChatModel()
+    use_llm(model)
+    animales_agent.run_agent("¿Qué come un panda?", use_cache=False, budget=NO_LIMITS._replace(output_tokens=50))
+    assert model._calls == 3
+
+
+def test_a_run_stopped_by_its_budget_is_not_cached(use_llm, monkeypatch):
+    responses = ResponseCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(animales_agent, "response_cache", responses)
+    model = LoopingChatModel(text="Los pandas comen bambú.")
+    use_llm(model)
+
+    for _ in range(2):
+        result = animales_agent.run_agent("¿Qué come un panda?", budget=NO_LIMITS._replace(llm_steps=1))
+        assert result.source == "model"
+    assert model._calls == 2
+    assert responses.get("¿Qué come un panda?") is None
+    assert animales_agent.cacheable_answer(result) is None
+
+
+def test_token_ledger_totals_and_top_keys():
+    ledger = TokenLedger(max_keys=2)
+    ledger.add("thread-a", 100, 10)
+    ledger.add("thread-b", 500, 50)
+    ledger.add("thread-a", 100, 10)
+    assert ledger.get("thread-a") == (200, 20)
+    assert ledger.top(1) == [("thread-b", 500, 50)]
+    assert ledger.samples(1) == {("thread-b", "input"): 500, ("thread-b", "output"): 50}
+
+    ledger.add("thread-c", 1, 1)  # thread-b is the least recently updated
+    assert ledger.get("thread-b") == (0, 0)
+    assert ledger.stats() == {"keys": 2, "input_tokens": 201, "output_tokens": 21}
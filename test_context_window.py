@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the context window of long conversations
+"""
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent_runtime.context_window import ContextWindowManager, estimate_tokens
+
+
+class RecordingSummarizer:
+    """Summarizer that records which turns it folded"""
+
+    def __init__(self):
+        self.folded = []
+
+    def __call__(self, summary, messages, deadline):
+        questions = [message.content for message in messages if message.type == "human"]
+        self.folded.append(questions)
+        return " ".join(filter(None, [summary, *questions]))
+
+
+def converse(manager, turns):
+    """Run the manager over a conversation of `turns` questions; returns the final state"""
+    state = {"history": [], "summary": ""}
+    for turn in range(1, turns + 1):
+        question = HumanMessage(content=f"q{turn}")
+        state = {**state, "messages": [question]}
+        state.update(manager(state))
+        state["history"] = [*state["history"], question, AIMessage(content=f"a{turn}")]
+    return state
+
+
+def test_summarizer_runs_once_per_batch_of_turns():
+    """With 2 kept turns and batches of 3, the window grows to 6 turns before being cut back to 2"""
+    summarizer = RecordingSummarizer()
+    state = converse(ContextWindowManager(summarizer, max_turns=2, max_tokens=10**6, batch_turns=3), 12)
+
+    assert summarizer.folded == [["q1", "q2", "q3", "q4"], ["q5", "q6", "q7", "q8"]]
+    assert state["summary"] == " ".join(f"q{turn}" for turn in range(1, 9))
+    assert [message.content for message in state["history"][::2]] == ["q9", "q10", "q11", "q12"]
+
+
+def test_without_batching_every_turn_past_the_window_is_summarized():
+    summarizer = RecordingSummarizer()
+    converse(ContextWindowManager(summarizer, max_turns=2, max_tokens=10**6, batch_turns=0), 5)
+    assert summarizer.folded == [["q1"], ["q2"], ["q3"]]
+
+
+def test_over_the_token_budget_the_window_is_cut_to_the_low_water_mark():
+    """Turns of ~100 tokens with a budget of 500: cut at over 500, down to at most 375"""
+    summarizer = RecordingSummarizer()
+    manager = ContextWindowManager(summarizer, max_turns=100, max_tokens=500, batch_turns=100)
+    turn = [HumanMessage(content="x" * 200), AIMessage(content="y" * 200)]
+    history = turn * 5
+    current = [HumanMessage(content="z" * 200)]
+
+    update = manager({"history": history, "messages": current, "summary": ""})
+    assert len(summarizer.folded) == 1
+    assert estimate_tokens([*update["history"], *current]) <= 375
+    assert len(update["history"]) == 2 * 3
+
+
+def test_a_failed_summary_keeps_the_previous_one():
+    def fail(summary, messages, deadline):
+        raise RuntimeError("no model")
+
+    manager = ContextWindowManager(fail, max_turns=1, max_tokens=10**6, batch_turns=0)
+    history = [HumanMessage(content="q1"), AIMessage(content="a1")]
+    update = manager({"history": history, "messages": [HumanMessage(content="q2")], "summary": "antes"})
+    assert update == {"history": [], "summary": "antes"}
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the conversation state stores
+"""
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent_runtime import conversation_store
+from agent_runtime.conversation_store import InMemoryConversationStore, SQLiteConversationStore
+from agent_runtime.history import HistoryEntry
+
+
+# Modules whose time the clock fixture (conftest.py) controls
+CLOCK_MODULES = (conversation_store,)
+
+
+def state(text="hola"):
+    return {"messages": [], "summary": text}
+
+
+def test_least_recently_used_thread_is_evicted(clock):
+    """Beyond max_threads the thread used longest ago goes first; get() counts as a use"""
+    store = InMemoryConversationStore(max_threads=2, ttl_seconds=60, max_bytes=10**6)
+    store.set("a", state("a"))
+    store.set("b", state("b"))
+    assert store.get("a") == state("a")
+    store.set("c", state("c"))
+
+    assert store.get("b") is None
+    assert store.get("a") == state("a")
+    assert store.get("c") == state("c")
+    assert store.stats()["evictions_lru"] == 1
+
+
+def test_threads_expire_after_ttl_and_access_refreshes_it(clock):
+    store = InMemoryConversationStore(max_threads=10, ttl_seconds=60, max_bytes=10**6)
+    store.set("a", state())
+    store.set("b", state())
+    clock.now += 50
+    assert store.get("a") is not None
+    clock.now += 20
+
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.stats()["evictions_ttl"] == 1
+    assert len(store) == 1
+
+
+def test_memory_budget_evicts_oldest_and_rejects_oversized_states(clock):
+    size = conversation_store.estimate_state_size({"messages": [HumanMessage(content="x" * 100)]})
+    store = InMemoryConversationStore(max_threads=10, ttl_seconds=60, max_bytes=2 * size)
+    for thread in ("a", "b", "c"):
+        store.set(thread, {"messages": [HumanMessage(content="x" * 100)]})
+    assert store.get("a") is None
+    assert len(store) == 2
+
+    store.set("big", {"messages": [HumanMessage(content="x" * 10 * size)]})
+    assert store.get("big") is None
+    assert store.stats()["bytes"] <= 2 * size
+    assert store.stats()["evictions_memory"] == 2
+
+
+def test_sqlite_store_round_trips_states_between_instances(tmp_path, clock):
+    """Another process (here, another instance on the same file) sees the same conversation"""
+    path = str(tmp_path / "conversations.db")
+    tool_call = {"name": "get_current_datetime", "args": {}, "id": "call-1", "type": "tool_call"}
+    stored = {
+        "messages": [
+            HistoryEntry("human", "¿Qué hora es?"),
+            HistoryEntry("ai", "Son las diez.", tools="get_current_datetime: 10:00"),
+            HumanMessage(content="¿Y en Madrid?", id="h-2"),
+            AIMessage(content="", id="a-2", tool_calls=[tool_call]),
+            ToolMessage(content="11:00", name="get_current_datetime", tool_call_id="call-1", id="t-2"),
+        ],
+        "summary": "resumen",
+        "agent": "animales",
+    }
+    SQLiteConversationStore(path).set("thread", stored)
+
+    loaded = SQLiteConversationStore(path).get("thread")
+    assert loaded["summary"] == "resumen" and loaded["agent"] == "animales"
+    assert loaded["messages"][:2] == stored["messages"][:2]
+    assert [(m.type, m.content) for m in loaded["messages"][2:]] == [(m.type, m.content) for m in stored["messages"][2:]]
+    assert loaded["messages"][3].tool_calls == [tool_call]
+    assert loaded["messages"][4].tool_call_id == "call-1"
+
+
+def test_sqlite_store_expires_and_prunes_threads(tmp_path, clock):
+    store = SQLiteConversationStore(str(tmp_path / "conversations.db"), max_threads=2, ttl_seconds=60)
+    store.set("old", state("old"))
+    clock.now += 61
+    assert store.get("old") is None
+
+    for thread in ("a", "b", "c"):
+        clock.now += 1
+        store.set(thread, state(thread))
+    store.prune()
+    assert len(store) == 2
+    assert store.get("a") is None
+    assert store.get("c") == state("c")
+    assert store.stats()["evictions_lru"] == 1
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for Slack event deduplication
+"""
+
+from agent_runtime import dedup
+from agent_runtime.dedup import InMemoryEventDeduplicator, SQLiteEventDeduplicator, event_keys
+
+
+# Modules whose time the clock fixture (conftest.py) controls
+CLOCK_MODULES = (dedup,)
+
+
+def test_event_keys():
+    event = {"client_msg_id": "m-1", "text": "hola"}
+    assert event_keys(event, {"event_id": "Ev1"}) == ["event:Ev1", "msg:m-1"]
+    assert event_keys({"text": "hola"}) == []
+
+
+def test_redelivered_event_is_claimed_once(clock):
+    """A redelivery (same event_id) or a new event for the same message (same client_msg_id) is a duplicate"""
+    deduplicator = InMemoryEventDeduplicator(ttl_seconds=60, max_entries=100)
+    assert deduplicator.claim(["event:Ev1", "msg:m-1"])
+    assert not deduplicator.claim(["event:Ev1", "msg:m-1"])
+    assert not deduplicator.claim(["event:Ev2", "msg:m-1"])
+    assert deduplicator.claim(["event:Ev3", "msg:m-2"])
+    assert deduplicator.stats() == {"keys": 4, "accepted": 2, "duplicates": 2}
+
+
+def test_keys_expire_after_ttl_and_are_bounded(clock):
+    deduplicator = InMemoryEventDeduplicator(ttl_seconds=60, max_entries=2)
+    assert deduplicator.claim(["event:Ev1"])
+    clock.now += 61
+    assert deduplicator.claim(["event:Ev1"])
+
+    deduplicator.claim(["event:Ev2"])
+    deduplicator.claim(["event:Ev3"])
+    assert deduplicator.stats()["keys"] == 2
+    assert deduplicator.claim(["event:Ev1"])
+
+
+def test_sqlite_deduplicator_is_shared_between_instances(tmp_path, clock):
+    """Worker processes sharing the file handle each event once"""
+    path = str(tmp_path / "events.db")
+    first = SQLiteEventDeduplicator(path, ttl_seconds=60)
+    second = SQLiteEventDeduplicator(path, ttl_seconds=60)
+    assert first.claim(["event:Ev1"])
+    assert not second.claim(["event:Ev1"])
+    clock.now += 61
+    assert second.claim(["event:Ev1"])
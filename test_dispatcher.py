@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-thread message dispatcher
+"""
+
+import threading
+import time
+
+from agent_runtime.dispatcher import ThreadDispatcher
+
+
+def test_jobs_of_a_key_run_in_submission_order():
+    """Messages of one thread are processed one at a time, in order"""
+    dispatcher = ThreadDispatcher(max_workers=4, max_queue_depth=100)
+    seen = {"a": [], "b": []}
+    running = {"a": 0, "b": 0}
+    overlaps = []
+    lock = threading.Lock()
+
+    def job(key, index):
+        with lock:
+            running[key] += 1
+            if running[key] > 1:
+                overlaps.append((key, index))
+        time.sleep(0.002 * (index % 3))
+        with lock:
+            seen[key].append(index)
+            running[key] -= 1
+
+    for index in range(20):
+        assert dispatcher.submit("a", job, "a", index)
+        assert dispatcher.submit("b", job, "b", index)
+    assert dispatcher.shutdown(wait=True, timeout=10)
+
+    assert seen == {"a": list(range(20)), "b": list(range(20))}
+    assert overlaps == []
+
+
+def test_different_keys_run_in_parallel():
+    """Two threads' messages don't wait for each other"""
+    dispatcher = ThreadDispatcher(max_workers=2, max_queue_depth=10)
+    barrier = threading.Barrier(2, timeout=5)
+    passed = []
+
+    def job():
+        barrier.wait()
+        passed.append(True)
+
+    dispatcher.submit("a", job)
+    dispatcher.submit("b", job)
+    assert dispatcher.shutdown(wait=True, timeout=10)
+    assert passed == [True, True]
+
+
+def test_submissions_beyond_the_queue_depth_are_rejected():
+    """Once max_queue_depth jobs are pending, submit refuses new ones until some finish"""
+    dispatcher = ThreadDispatcher(max_workers=1, max_queue_depth=2)
+    release = threading.Event()
+    done = []
+
+    assert dispatcher.submit("a", release.wait, 5)
+    assert dispatcher.submit("b", done.append, "b")
+    assert not dispatcher.submit("c", done.append, "c")
+    assert dispatcher.stats() == {"pending": 2, "active_keys": 2, "rejected": 1, "dropped": 0}
+
+    release.set()
+    assert dispatcher.shutdown(wait=True, timeout=10)
+    assert done == ["b"]
+    assert dispatcher.stats()["pending"] == 0
+
+
+def test_a_failing_job_does_not_block_its_key():
+    """An exception in one message's job still lets the next message of the thread run"""
+    dispatcher = ThreadDispatcher(max_workers=1, max_queue_depth=10)
+    done = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    dispatcher.submit("a", fail)
+    dispatcher.submit("a", done.append, "next")
+    assert dispatcher.shutdown(wait=True, timeout=10)
+    assert done == ["next"]
+    assert dispatcher.stats() == {"pending": 0, "active_keys": 0, "rejected": 0, "dropped": 0}
+
+
+def test_jobs_left_after_a_drain_timeout_are_dropped():
+    """A thread's later messages are dropped, not lost mid-flight, once the pool is shut down"""
+    dispatcher = ThreadDispatcher(max_workers=1, max_queue_depth=10)
+    started, release = threading.Event(), threading.Event()
+    done = []
+
+    def first():
+        started.set()
+        release.wait(5)
+        done.append("first")
+
+    dispatcher.submit("a", first)
+    dispatcher.submit("a", done.append, "second")
+    assert started.wait(5)
+    assert not dispatcher.shutdown(wait=True, timeout=0.05)
+    assert not dispatcher.submit("b", done.append, "late")
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while dispatcher.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert done == ["first"]
+    assert dispatcher.stats() == {"pending": 0, "active_keys": 0, "rejected": 1, "dropped": 1}
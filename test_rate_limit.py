@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the Slack rate limits and the cap on agent runs in flight
+"""
+
+import threading
+import time
+
+from agent_runtime import rate_limit
+from agent_runtime.rate_limit import ConcurrencyLimiter, RateLimiter
+
+
+# Modules whose time the clock fixture (conftest.py) controls
+CLOCK_MODULES = (rate_limit,)
+
+
+def test_burst_is_allowed_then_tokens_refill_at_the_rate(clock):
+    limiter = RateLimiter({"user": (1.0, 3)})
+    for _ in range(3):
+        assert limiter.acquire({"user": "U1"}) is None
+    assert limiter.acquire({"user": "U1"}) == ("user", 1.0)
+    assert limiter.acquire({"user": "U2"}) is None  # other users have their own bucket
+
+    clock.now += 0.5
+    assert limiter.acquire({"user": "U1"}) == ("user", 0.5)
+    clock.now += 0.5
+    assert limiter.acquire({"user": "U1"}) is None
+
+    clock.now += 60  # idle buckets refill up to the burst, not beyond
+    for _ in range(3):
+        assert limiter.acquire({"user": "U1"}) is None
+    assert limiter.acquire({"user": "U1"}) is not None
+    assert limiter.stats() == {"keys": 2, "allowed": 8, "limited": 3}
+
+
+def test_scopes_are_consumed_all_or_nothing(clock):
+    """A message limited by its channel doesn't use up its user's tokens"""
+    limiter = RateLimiter({"user": (1.0, 2), "channel": (1.0, 1)})
+    assert limiter.acquire({"user": "U1", "channel": "C1"}) is None
+    assert limiter.acquire({"user": "U1", "channel": "C1"}) == ("channel", 1.0)
+    assert limiter.acquire({"user": "U1", "channel": "C2"}) is None
+    assert limiter.acquire({"user": "U1", "channel": "C3"}) == ("user", 1.0)
+
+
+def test_limiter_forgets_the_least_recently_used_keys(clock):
+    limiter = RateLimiter({"user": (1.0, 1)}, max_keys=2)
+    for user in ("U1", "U2", "U3"):
+        assert limiter.acquire({"user": user}) is None
+    assert limiter.stats()["keys"] == 2
+    assert limiter.acquire({"user": "U3"}) is not None
+    assert limiter.acquire({"user": "U1"}) is None  # forgotten, so its bucket is full again
+
+
+def test_runs_beyond_the_cap_wait_and_time_out():
+    runs = ConcurrencyLimiter(max_concurrent=2)
+    assert runs.try_acquire() and runs.try_acquire()
+    assert not runs.try_acquire()
+    assert not runs.acquire(timeout=0.05)
+    assert runs.stats() == {"max_concurrent": 2, "active": 2, "waiting": 0, "timeouts": 1}
+
+
+def test_a_released_slot_goes_to_a_waiting_run():
+    runs = ConcurrencyLimiter(max_concurrent=1)
+    assert runs.try_acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(runs.acquire(timeout=5)))
+    waiter.start()
+    while runs.stats()["waiting"] == 0:
+        time.sleep(0.001)
+    runs.release()
+    waiter.join()
+
+    assert acquired == [True]
+    assert runs.stats() == {"max_concurrent": 1, "active": 1, "waiting": 0, "timeouts": 0}
+    runs.release()
+    assert runs.stats()["active"] == 0
+
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM circuit breaker and guarded calls
+"""
+
+import threading
+import time
+
+import pytest
+
+from agent_runtime import resilience
+from agent_runtime.resilience import CircuitBreaker, LLMUnavailableError, ResilientLLM, deadline_after
+
+
+# Modules whose time the clock fixture (conftest.py) controls
+CLOCK_MODULES = (resilience,)
+
+
+def breaker():
+    return CircuitBreaker("model", failure_threshold=3, window=5, slow_call_seconds=10, reset_seconds=30)
+
+
+def test_breaker_opens_after_threshold_failures_in_window(clock):
+    circuit = breaker()
+    for ok in (False, True, False, True):
+        assert circuit.allow()
+        circuit.record(ok)
+    assert circuit.state == CircuitBreaker.CLOSED
+
+    circuit.record(True, seconds=12)  # slow calls count as failures
+    assert circuit.state == CircuitBreaker.OPEN
+    assert not circuit.allow()
+    assert circuit.stats() == {"open": 1, "recent_failures": 3, "opened": 1, "rejected": 1}
+
+
+def test_old_failures_leave_the_window(clock):
+    circuit = breaker()
+    for ok in (False, False, True, True, True, True, False):
+        circuit.record(ok)
+    assert circuit.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_one_trial_and_success_closes(clock):
+    circuit = breaker()
+    for _ in range(3):
+        circuit.record(False)
+    clock.now += 29
+    assert not circuit.allow()
+    clock.now += 1
+
+    assert circuit.allow()
+    assert circuit.state == CircuitBreaker.HALF_OPEN
+    assert not circuit.allow()  # only one trial call at a time
+    circuit.record(True)
+    assert circuit.state == CircuitBreaker.CLOSED
+    assert circuit.allow()
+    assert circuit.stats()["recent_failures"] == 0
+
+
+def test_failed_trial_reopens_for_another_reset_period(clock):
+    circuit = breaker()
+    for _ in range(3):
+        circuit.record(False)
+    clock.now += 30
+    assert circuit.allow()
+    circuit.record(False)
+
+    assert circuit.state == CircuitBreaker.OPEN
+    assert not circuit.allow()
+    clock.now += 30
+    assert circuit.allow()
+    assert circuit.stats()["opened"] == 2
+
+
+class ProviderError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def test_guard_falls_back_when_the_primary_fails():
+    guard = ResilientLLM(fallback_model="fallback", call_timeout=5, max_workers=2)
+    called = []
+
+    def invoke(model):
+        called.append(model)
+        if model == "primary":
+            raise ProviderError(503)
+        return f"answer from {model}"
+
+    assert guard.call(invoke, "primary") == "answer from fallback"
+    assert called == ["primary", "fallback"]
+
+
+def test_guard_raises_when_no_model_answers_in_time():
+    guard = ResilientLLM(fallback_model=None, call_timeout=5, max_workers=2)
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailableError):
+        guard.call(lambda model: time.sleep(2), "primary", deadline_after(0.2))
+    assert time.monotonic() - start < 1
+
+
+def test_waiting_for_a_call_slot_is_not_call_time():
+    """With more callers than slots, queued calls still get their full timeout"""
+    guard = ResilientLLM(fallback_model=None, call_timeout=0.5, max_workers=1)
+    results = []
+
+    def call():
+        results.append(guard.call(lambda model: time.sleep(0.3) or "ok", "primary"))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["ok", "ok", "ok"]
+    assert guard.breaker("primary").state == CircuitBreaker.CLOSED
+
+
+class ServiceUnavailable(Exception):
+    """Named like google-api-core's 503 error"""
+
+
+def test_only_provider_failures_are_upstream():
+    assert resilience.is_upstream_failure(TimeoutError())
+    assert resilience.is_upstream_failure(ConnectionResetError())
+    assert resilience.is_upstream_failure(ProviderError(503))
+    assert resilience.is_upstream_failure(ProviderError(429))
+    assert resilience.is_upstream_failure(ServiceUnavailable())
+    assert not resilience.is_upstream_failure(ProviderError(400))
+    assert not resilience.is_upstream_failure(ProviderError(401))
+    assert not resilience.is_upstream_failure(ValueError("Please set GEMINI_API_KEY environment variable"))
+    assert not resilience.is_upstream_failure(TypeError("bug"))
+
+
+def test_errors_that_are_not_upstream_are_raised_without_opening_the_circuit():
+    guard = ResilientLLM(fallback_model="fallback", call_timeout=5, max_workers=2)
+    called = []
+
+    def invoke(model):
+        called.append(model)
+        raise ValueError("Please set GEMINI_API_KEY environment variable")
+
+    for _ in range(10):
+        with pytest.raises(ValueError):
+            guard.call(invoke, "primary")
+    assert called == ["primary"] * 10
+    assert guard.breaker("primary").state == CircuitBreaker.CLOSED
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the background Slack calls
+"""
+
+import threading
+import time
+
+from agent_runtime.slack_io import SlackIO
+
+
+class FakeStatusClient:
+    """Slack client whose setStatus calls block until released"""
+
+    def __init__(self):
+        self.statuses = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def assistant_threads_setStatus(self, channel_id, thread_ts, status):
+        self.started.set()
+        self.release.wait(5)
+        self.statuses.append((thread_ts, status))
+        return {"ok": True}
+
+
+def test_only_the_latest_pending_status_of_a_thread_is_sent():
+    client = FakeStatusClient()
+    io = SlackIO(client, max_workers=2)
+    io.set_status("C1", "t1", "Buscando...")
+    assert client.started.wait(5)
+    for status in ("Consultando la hora...", "Pensando...", "Escribiendo..."):
+        io.set_status("C1", "t1", status)
+    client.release.set()
+    io.shutdown()
+
+    assert client.statuses == [("t1", "Buscando..."), ("t1", "Escribiendo...")]
+    assert io.stats()["status_sent"] == 2
+    assert io.stats()["status_coalesced"] == 2
+
+
+def test_a_status_already_shown_is_not_sent_again():
+    client = FakeStatusClient()
+    client.release.set()
+    io = SlackIO(client, max_workers=1)
+    io.set_status("C1", "t1", "Buscando...")
+    deadline = time.monotonic() + 5
+    while io.stats()["status_sent"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    io.set_status("C1", "t1", "Buscando...")
+    io.shutdown()
+
+    assert client.statuses == [("t1", "Buscando...")]
+    assert io.stats()["status_coalesced"] == 1
+
+
+def test_pending_statuses_are_dropped_before_the_reply():
+    """No status lands after the answer (it would stay shown under it)"""
+    client = FakeStatusClient()
+    io = SlackIO(client, max_workers=1)
+    io.set_status("C1", "t1", "Buscando...")
+    assert client.started.wait(5)
+    io.set_status("C1", "t1", "Pensando...")
+
+    threading.Timer(0.05, client.release.set).start()
+    io.before_reply("C1", "t1")
+    io.shutdown()
+
+    assert client.statuses == [("t1", "Buscando...")]
+    assert io.stats()["threads"] == 0
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming the agent's answer
+"""
+
+import itertools
+import threading
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+import animales_agent
+from agent_runtime.resilience import ResilientLLM
+
+
+class LateFirstCallChatModel(BaseChatModel):
+    """Chat model whose first call stalls past the timeout and then streams anyway"""
+
+    _calls: Any = PrivateAttr(default_factory=itertools.count)
+
+    @property
+    def _llm_type(self) -> str:
+        return "late-first-call"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _words(self):
+        """The words of the answer and the delay before each one"""
+        if next(self._calls) == 0:
+            time.sleep(0.35)
+            return ["tarde"] * 5, 0.03
+        return ["a tiempo"] * 10, 0.02
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        words, delay = self._words()
+        for word in words:
+            time.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(content=" ".join(self._words()[0]))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_a_timed_out_call_does_not_stream_into_the_fallback_answer(use_llm, monkeypatch):
+    """Tokens the abandoned primary call generates after its timeout are not forwarded"""
+    monkeypatch.setattr(animales_agent, "llm_guard", ResilientLLM(fallback_model="fallback", call_timeout=0.3))
+    use_llm(LateFirstCallChatModel())
+
+    tokens = []
+    lock = threading.Lock()
+
+    def on_token(token):
+        with lock:
+            tokens.append(token)
+
+    result = animales_agent.run_agent("¿Qué come un panda?", on_token=on_token, use_cache=False)
+    assert result.answer.startswith("a tiempo")
+    assert tokens and all(token == "a tiempo " for token in tokens)
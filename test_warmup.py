@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm-up of the suggested prompts
+"""
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from agent_runtime.response_cache import ResponseCache
+from agent_runtime.warmup import PromptWarmer
+from animales_agent import warmup_answer
+from benchmarks.fakes import FakeChatModel
+
+QUESTIONS = ["¿Qué come un panda?", "¿Cuánto vive un elefante?"]
+
+
+class UnreachableChatModel(BaseChatModel):
+    """Chat model whose provider can't be reached"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "unreachable"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise ConnectionError("upstream unreachable")
+
+
+class DateToolChatModel(BaseChatModel):
+    """Chat model that checks the date before every answer"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "date-tool"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if messages[-1].type == "tool":
+            message = AIMessage(content="Hoy los pandas comen bambú.")
+        else:
+            call = {"name": "get_current_datetime", "args": {}, "id": "call-1", "type": "tool_call"}
+            message = AIMessage(content="", tool_calls=[call])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def cache():
+    return ResponseCache(max_entries=10, ttl_seconds=60)
+
+
+def test_degraded_answers_are_not_pinned_and_are_retried(use_llm):
+    """During an outage nothing is pinned; the next refresh caches the model's answers"""
+    responses = cache()
+    warmer = PromptWarmer(warmup_answer, responses, QUESTIONS)
+
+    use_llm(UnreachableChatModel())
+    assert warmer.warm_once() == 0
+    assert all(responses.get(question) is None for question in QUESTIONS)
+
+    use_llm(FakeChatModel(first_token_latency=0, token_latency=0, output_tokens=5))
+    assert warmer.warm_once() == 2
+    assert all(responses.get(question).startswith("Los animales") for question in QUESTIONS)
+
+
+def test_answers_that_used_tools_are_not_pinned(use_llm):
+    use_llm(DateToolChatModel())
+    responses = cache()
+    assert PromptWarmer(warmup_answer, responses, QUESTIONS[:1]).warm_once() == 0
+    assert responses.get(QUESTIONS[0]) is None